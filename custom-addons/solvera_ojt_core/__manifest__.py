@@ -19,9 +19,11 @@
     ],
     'data': [
         'data/ir_sequence.xml',
+        'data/ir_config_parameter.xml',
         'data/mail_template_applicant_stage.xml',
         'security/ir.model.access.csv',
         'data/cron.xml',
+        'data/ojt_kpi_data.xml',
         'views/ojt_batch_views.xml',
         'views/ojt_event_link_views.xml',
         'views/ojt_participant_views.xml',
@@ -29,7 +31,11 @@
         'views/ojt_submission_views.xml',
         'views/ojt_attendance_views.xml',
         'views/ojt_certificate_views.xml',
+        'views/ojt_attendance_report_views.xml',
+        'report/ojt_certificate_report.xml',
+        'report/ojt_event_link_qr_sheet.xml',
         'views/res_config_settings_views.xml',
+        'views/hr_recruitment_stage_views.xml',
         'views/portal_ojt_templates.xml',
         'views/menu.xml',
     ],
@@ -1,3 +1,5 @@
 # -*- coding: utf-8 -*-
 from . import ojt_portal
 from . import ojt_attendance
+from . import ojt_certificate
+from . import ojt_api
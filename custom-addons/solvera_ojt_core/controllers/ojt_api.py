@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+from odoo import http
+from odoo.exceptions import AccessError
+from odoo.http import request
+
+from ..models.ojt_change_log import CHANGE_LOG_MODELS
+
+# Progress API: fields clients may select (id and progress_version are always returned)
+PROGRESS_FIELDS = ("partner_id", "name", "state", "attendance_rate", "average_score", "final_score")
+PROGRESS_MAX_LIMIT = 500
+CHANGES_MAX_LIMIT = 10000
+
+
+class OjtProgressApi(http.Controller):
+
+    # Helper: JSON error body with status
+    def _error(self, message, status):
+        return request.make_json_response({"error": message}, status=status)
+
+    # Helper: non-negative int query argument
+    def _int_arg(self, value, default):
+        try:
+            return max(0, int(value))
+        except (TypeError, ValueError):
+            return default
+
+    # Route: participant progress of a batch (API key via "Authorization: Bearer", or a session)
+    @http.route(["/ojt/api/v1/batches/<int:batch_id>/progress"], type="http", auth="bearer", methods=["GET"], csrf=False, sitemap=False)
+    def ojt_api_batch_progress(self, batch_id=None, **kw):
+        """GET ?fields=final_score,state&since=<version>&after=<id>&limit=200
+
+        Returns participants changed since ``since`` (the ``version`` of the
+        first page of a previous sync), keyset-paged by id via ``after``/``next_after``.
+        The first page also lists ``removed`` participant ids (deleted or moved away).
+        Rows may repeat across syncs; applying them again is harmless.
+        """
+        if not request.env.user.has_group("base.group_user"):
+            return self._error("forbidden", 403)
+        try:
+            batch = request.env["ojt.batch"].search([("id", "=", batch_id)])
+        except AccessError:
+            return self._error("forbidden", 403)
+        if not batch:
+            return self._error("not found", 404)
+
+        requested = [f.strip() for f in (kw.get("fields") or "").split(",") if f.strip()]
+        unknown = [f for f in requested if f not in PROGRESS_FIELDS]
+        if unknown:
+            return self._error("unknown field(s): %s" % ", ".join(unknown), 400)
+        fields = ["progress_version"] + (requested or list(PROGRESS_FIELDS))
+        since = self._int_arg(kw.get("since"), 0)
+        after = self._int_arg(kw.get("after"), 0)
+        limit = min(PROGRESS_MAX_LIMIT, self._int_arg(kw.get("limit"), 200) or 200)
+
+        # Version: oldest transaction still running; every later commit stamps a txid >= it
+        cr = request.env.cr
+        cr.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        version = cr.fetchone()[0]
+
+        rows = request.env["ojt.participant"].search_read(
+            [("batch_id", "=", batch.id), ("progress_version", ">=", since), ("id", ">", after)],
+            fields, order="id", limit=limit + 1,
+        )
+        for row in rows:
+            if "partner_id" in row:
+                row["partner_id"] = row["partner_id"] and row["partner_id"][0]
+        removed = []
+        if since and not after:
+            cr.execute(
+                """
+                SELECT DISTINCT participant_id
+                  FROM ojt_participant_progress_removed
+                 WHERE batch_id = %(batch)s AND version >= %(since)s
+                   AND participant_id NOT IN (SELECT id FROM ojt_participant WHERE batch_id = %(batch)s)
+              ORDER BY participant_id
+                """,
+                {"batch": batch.id, "since": since},
+            )
+            removed = [r[0] for r in cr.fetchall()]
+        payload = {
+            "rows": rows[:limit],
+            "removed": removed,
+            "next_after": rows[limit - 1]["id"] if len(rows) > limit else None,
+        }
+
+        # ETag: hash of the page content; an unchanged page answers 304 (the client keeps its version)
+        etag = hashlib.sha1(repr((batch.id, since, after, limit, fields, payload)).encode()).hexdigest()
+        headers = [("ETag", '"%s"' % etag), ("Cache-Control", "private, no-cache")]
+        if request.httprequest.if_none_match.contains(etag):
+            return request.make_response("", headers=headers, status=304)
+        return request.make_json_response(dict(payload, batch_id=batch.id, version=version), headers=headers)
+
+    # Route: change feed as NDJSON, one line per logged create/write/unlink
+    @http.route(["/ojt/api/v1/changes"], type="http", auth="bearer", methods=["GET"], csrf=False, sitemap=False)
+    def ojt_api_changes(self, **kw):
+        """GET ?cursor=<last line's cursor>&models=ojt.attendance,ojt.submission&limit=5000
+
+        The cursor to resume from is also sent as the ``X-OJT-Next-Cursor`` header;
+        an empty body means the client is up to date.
+        """
+        try:
+            request.env["ojt.change.log"].check_access("read")
+        except AccessError:
+            return self._error("forbidden", 403)
+        models = [m.strip() for m in (kw.get("models") or "").split(",") if m.strip()]
+        unknown = [m for m in models if m not in CHANGE_LOG_MODELS]
+        if unknown:
+            return self._error("unknown model(s): %s" % ", ".join(unknown), 400)
+        limit = min(CHANGES_MAX_LIMIT, self._int_arg(kw.get("limit"), 5000) or 5000)
+        try:
+            lines, next_cursor = request.env["ojt.change.log"]._export_ndjson(kw.get("cursor"), limit, models)
+        except ValueError:
+            return self._error("invalid cursor", 400)
+        body = "".join(line + "\n" for line in lines)
+        return request.make_response(body, headers=[
+            ("Content-Type", "application/x-ndjson"),
+            ("Cache-Control", "no-store"),
+            ("X-OJT-Next-Cursor", next_cursor),
+        ])
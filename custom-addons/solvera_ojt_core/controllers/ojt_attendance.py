@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
-from odoo import http, fields
-from odoo.http import request
+from odoo import http
+from odoo.http import request, content_disposition
+from odoo.addons.solvera_ojt_core.models.ojt_qr import QR_FORMATS
 from urllib.parse import quote as url_quote
 
 
@@ -28,30 +29,59 @@ def _make_absolute(url: str) -> str:
 
 
 class OjtAttendancePublic(http.Controller):
-    # Helper: enforce check-in time window and return (ok, message)
-    def _check_window_and_message(self, att):
-        icp = request.env["ir.config_parameter"].sudo()
-        try:
-            early = int(icp.get_param("ojt_early_checkin_open_minutes", 15))
-        except Exception:
-            early = 15
-        try:
-            close = int(icp.get_param("ojt_close_checkin_after_end_minutes", 0))
-        except Exception:
-            close = 0
-
-        now = fields.Datetime.now()
-        start = att.event_link_id.date_start
-        end = att.event_link_id.date_end
-        open_from = fields.Datetime.subtract(start, minutes=early) if start else None
-        close_at = fields.Datetime.add(end, minutes=close) if end else None
-
-        if open_from and now < open_from:
+    # Helper: map a window state to (ok, message)
+    def _window_message(self, state, start):
+        if state == "session_code":
+            return (False, "This session uses a shared check-in code. Please scan the code shown in the room.")
+        if state == "too_early":
             return (False, "Check-in opens at %s" % (start or "scheduled time"))
-        if close_at and now > close_at:
+        if state == "closed":
             return (False, "Session closed. Check-in is no longer available.")
         return (True, "")
 
+    # Helper: fast check-in mode toggle (Settings > OJT)
+    def _fast_checkin_enabled(self):
+        icp = request.env["ir.config_parameter"].sudo()
+        return bool(icp.get_param("ojt_fast_checkin", False))
+
+    # Helper: check in by token via fast SQL path or ORM fallback
+    def _check_in_by_token(self, token, method):
+        Att = request.env["ojt.attendance"].sudo()
+        if self._fast_checkin_enabled():
+            return Att._fast_check_in(token, method=method)
+
+        att = Att.search([("qr_token", "=", token)], limit=1)
+        if att.event_link_id and att.event_link_id.checkin_mode != "participant":
+            # shared and rotating sessions never accept personal tokens (shared screenshots)
+            return {"status": "session_code", "attendance_id": att.id, "date_start": att.event_link_id.date_start}
+        return self._check_in_record(att, method)
+
+    # Helper: check in an already resolved row (session QR modes skip the token entirely)
+    def _check_in_attendance(self, att, method):
+        if self._fast_checkin_enabled():
+            return request.env["ojt.attendance"].sudo()._fast_check_in(None, method=method, attendance_id=att.id)
+        return self._check_in_record(att, method)
+
+    # Helper: ORM check-in with the same statuses as the fast path
+    def _check_in_record(self, att, method):
+        Att = request.env["ojt.attendance"].sudo()
+        if not att:
+            return {"status": "not_found"}
+        result = {
+            "status": "already",
+            "attendance_id": att.id,
+            "date_start": att.event_link_id.date_start,
+            "online_meeting_url": att.event_link_id.online_meeting_url,
+        }
+        policy = Att._get_attendance_policy(att.batch_id.id)
+        window = Att._check_in_window_state(att.event_link_id.date_start, att.event_link_id.date_end, policy=policy)
+        if window:
+            result["status"] = window
+        elif not att.check_in:
+            att.action_check_in(method=method)
+            result["status"] = "checked_in"
+        return result
+
     # Helper: client-side redirect page (meta + JS)
     def _external_redirect(self, url: str):
         url = _normalize_http_url(url)
@@ -62,36 +92,92 @@ class OjtAttendancePublic(http.Controller):
     # Route: QR check-in (renders confirmation)
     @http.route(["/ojt/q/<string:token>"], type="http", auth="public", website=True, csrf=False, sitemap=False)
     def ojt_qr_check(self, token=None, **kw):
-        Att = request.env["ojt.attendance"].sudo()
-        att = Att.search([("qr_token", "=", token)], limit=1)
-        if not att:
+        result = self._check_in_by_token(token, "qr")
+        if result["status"] == "not_found":
             return request.not_found()
 
-        ok, msg = self._check_window_and_message(att)
+        ok, msg = self._window_message(result["status"], result.get("date_start"))
         if not ok:
             return request.render("solvera_ojt_core.portal_ojt_qr_success", {"message": msg})
+        return request.render("solvera_ojt_core.portal_ojt_qr_success", {"message": "Check-in recorded."})
 
-        if not att.check_in:
-            att.action_check_in(method="qr")
+    # Route: shared session QR; the signed-in participant is resolved to their own row
+    @http.route(["/ojt/s/<string:token>"], type="http", auth="user", website=True, csrf=False, sitemap=False)
+    def ojt_session_check(self, token=None, **kw):
+        link = request.env["ojt.event.link"].sudo().search(
+            [("session_token", "=", token), ("checkin_mode", "=", "session")], limit=1
+        )
+        if not link:
+            return request.not_found()
+        return self._render_session_check_in(link)
+
+    # Route: rotating session QR (signed per time window; expired codes and screenshots are rejected)
+    @http.route(["/ojt/r/<int:link_id>/<int:window>/<string:signature>"], type="http", auth="user", website=True, csrf=False, sitemap=False)
+    def ojt_rotating_check(self, link_id=None, window=None, signature=None, **kw):
+        link = request.env["ojt.event.link"].sudo().browse(link_id).exists()
+        if not link or not link._verify_rotating_code(window, signature):
+            return request.render("solvera_ojt_core.portal_ojt_qr_success", {
+                "message": "This code has expired. Please scan the code currently on screen.",
+            })
+        return self._render_session_check_in(link)
+
+    # Helper: resolve the signed-in participant for a session and check them in
+    def _render_session_check_in(self, link):
+        att = link._attendance_for_partner(request.env.user.partner_id.id)
+        if not att:
+            return request.render("solvera_ojt_core.portal_ojt_qr_success", {
+                "message": "You are not registered for this session.",
+            })
+        result = self._check_in_attendance(att, "qr")
+        ok, msg = self._window_message(result["status"], result.get("date_start"))
+        if not ok:
+            return request.render("solvera_ojt_core.portal_ojt_qr_success", {"message": msg})
         return request.render("solvera_ojt_core.portal_ojt_qr_success", {"message": "Check-in recorded."})
 
+    # Helper: event link for the projector routes (internal users only)
+    def _session_display_link(self, link_id):
+        if not request.env.user.has_group("base.group_user"):
+            return None
+        link = request.env["ojt.event.link"].search([("id", "=", link_id), ("checkin_mode", "=", "rotating")])
+        return link.sudo() if link else None
+
+    # Route: projector page; reloads the signed code every rotation period
+    @http.route(["/ojt/session/<int:link_id>/display"], type="http", auth="user", website=True, sitemap=False)
+    def ojt_session_display(self, link_id=None, **kw):
+        link = self._session_display_link(link_id)
+        if not link:
+            return request.not_found()
+        link._ensure_session_token()
+        return request.render("solvera_ojt_core.portal_ojt_session_display", {
+            "link": link,
+            "rotation_ms": max(5, link.checkin_rotation_seconds or 30) * 1000,
+        })
+
+    # Route: current rotating code as SVG (never cached: the value changes every window)
+    @http.route(["/ojt/session/<int:link_id>/qr.svg"], type="http", auth="user", sitemap=False)
+    def ojt_session_qr(self, link_id=None, **kw):
+        link = self._session_display_link(link_id)
+        if not link or not link.session_token:
+            return request.not_found()
+        QR = request.env["ojt.qr"]
+        content = QR._render(link._rotating_checkin_url(), "svg", QR._normalize_size(kw.get("size") or 640))
+        return request.make_response(content, headers=[
+            ("Content-Type", QR_FORMATS["svg"]),
+            ("Cache-Control", "no-store"),
+        ])
+
     # Route: auto check-in then redirect to meeting (via client redirect)
     @http.route(["/ojt/a/<string:token>"], type="http", auth="public", website=True, csrf=False, sitemap=False)
     def ojt_join_auto_check(self, token=None, **kw):
-        Att = request.env["ojt.attendance"].sudo()
-        att = Att.search([("qr_token", "=", token)], limit=1)
-        if not att:
+        result = self._check_in_by_token(token, "online")
+        if result["status"] == "not_found":
             return request.not_found()
 
-        ok, msg = self._check_window_and_message(att)
+        ok, msg = self._window_message(result["status"], result.get("date_start"))
         if not ok:
             return request.render("solvera_ojt_core.portal_ojt_qr_success", {"message": msg})
 
-        if not att.check_in:
-            att.action_check_in(method="online")
-
-        meeting = att.event_link_id.online_meeting_url or ""
-        return self._external_redirect(meeting)
+        return self._external_redirect(result.get("online_meeting_url") or "")
 
     # Route: QR image (canvas by default; server barcode engine optional)
     @http.route(["/ojt/qrimg/<string:token>"], type="http", auth="public", website=True, csrf=False, sitemap=False)
@@ -116,12 +202,7 @@ class OjtAttendancePublic(http.Controller):
             src = _normalize_http_url(src)
 
         if engine == "server":
-            try:
-                encoded = url_quote(src, safe="")
-                qr_path = f"/report/barcode?type=QR&value={encoded}&width=512&height=512"
-                return request.redirect(qr_path, code=302)
-            except Exception:
-                pass  # fallback to client
+            return request.redirect(f"/ojt/qr/{url_quote(token)}?mode={url_quote(mode)}", code=302)
 
         return request.render("solvera_ojt_core.portal_ojt_qr_client", {"qr_value": src})
 
@@ -145,3 +226,46 @@ class OjtAttendancePublic(http.Controller):
             return request.not_found()
 
         return request.render("solvera_ojt_core.portal_ojt_qr_png", {"qr_value": src})
+
+    # Helper: image response with long-lived cache headers and ETag/304
+    def _qr_response(self, content, key, fmt):
+        headers = [
+            ("Content-Type", QR_FORMATS.get(fmt, "image/png")),
+            ("Cache-Control", "public, max-age=604800"),
+            ("ETag", '"%s"' % key),
+        ]
+        if request.httprequest.if_none_match.contains(key):
+            return request.make_response("", headers=headers, status=304)
+        return request.make_response(content, headers=headers)
+
+    # Route: native QR image, rendered server-side once and served from the disk cache
+    @http.route(["/ojt/qr/<string:token>"], type="http", auth="public", csrf=False, sitemap=False)
+    def ojt_qr_native(self, token, **kw):
+        """/ojt/qr/<token>?mode=checkin|join&fmt=png|svg&size=512"""
+        att = request.env["ojt.attendance"].sudo().search([("qr_token", "=", token)], limit=1)
+        if not att:
+            return request.not_found()
+        value = att._qr_value((kw.get("mode") or "checkin").lower())
+        if not value:
+            return request.not_found()
+        fmt = (kw.get("fmt") or "png").lower()
+        content, key = request.env["ojt.qr"].get_image(value, fmt, kw.get("size"))
+        return self._qr_response(content, key, fmt)
+
+    # Route: every check-in QR of a session as one ZIP (internal users only)
+    @http.route(["/ojt/event/<int:event_link_id>/qr.zip"], type="http", auth="user", sitemap=False)
+    def ojt_qr_zip(self, event_link_id, **kw):
+        """/ojt/event/<id>/qr.zip?mode=checkin|join&fmt=png|svg&size=512"""
+        if not request.env.user.has_group("base.group_user"):
+            return request.not_found()
+        link = request.env["ojt.event.link"].search([("id", "=", event_link_id)])
+        if not link:
+            return request.not_found()
+        mode = (kw.get("mode") or "checkin").lower()
+        fmt = (kw.get("fmt") or "png").lower()
+        content = request.env["ojt.qr"].get_zip(link._qr_entries(mode), fmt, kw.get("size"))
+        filename = "qr-%s-%s.zip" % (link.title or "session", link.id)
+        return request.make_response(content, headers=[
+            ("Content-Type", "application/zip"),
+            ("Content-Disposition", content_disposition(filename)),
+        ])
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo import http
+from odoo.http import request
+
+
+class OjtCertificatePublic(http.Controller):
+
+    # Helper: JSON when asked via ?format=json or an Accept header preferring JSON
+    def _wants_json(self, kw):
+        if (kw.get("format") or "").lower() == "json":
+            return True
+        accept = request.httprequest.accept_mimetypes
+        return accept.best_match(["text/html", "application/json"]) == "application/json"
+
+    # Route: public verification (cached projection, ETag/304 for repeat scans)
+    @http.route(["/ojt/cert/<string:token>"], type="http", auth="public", website=True, csrf=False, sitemap=False)
+    def ojt_certificate_verify(self, token=None, **kw):
+        """Verify a certificate by QR token. /ojt/cert/<token>[?format=json]"""
+        cert = request.env["ojt.certificate"]._get_verification(token)
+        as_json = self._wants_json(kw)
+        headers = [
+            ("Cache-Control", "public, no-cache"),  # always revalidate: revocation shows immediately
+            ("Vary", "Accept"),
+        ]
+
+        if cert:
+            etag = '"%s-%s"' % (cert.etag, "json" if as_json else request.env.lang or "html")
+            headers.append(("ETag", etag))
+            if request.httprequest.if_none_match.contains(etag.strip('"')):
+                return request.make_response("", headers=headers, status=304)
+
+        if as_json:
+            body = json.dumps(cert.as_dict() if cert else {"valid": False})
+            return request.make_response(
+                body,
+                headers=headers + [("Content-Type", "application/json")],
+                status=200 if cert else 404,
+            )
+
+        response = request.render("solvera_ojt_core.portal_ojt_certificate_verify", {"cert": cert}, headers=headers)
+        if not cert:
+            response.status_code = 404
+        return response
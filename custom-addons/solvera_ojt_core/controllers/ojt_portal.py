@@ -1,8 +1,15 @@
 # -*- coding: utf-8 -*-
+from datetime import datetime
+
 from odoo import http, _
 from odoo.http import request
 from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
 
+# Detail page: one pager per section, each with its own query argument
+SECTION_PAGE_ARGS = {'submissions': 'sub_page', 'attendance': 'att_page', 'certificates': 'cert_page'}
+SECTION_STEP = 20
+JSON_SECTIONS = ('submissions', 'attendance')
+
 
 class OjtPortal(CustomerPortal):
 
@@ -10,14 +17,12 @@ class OjtPortal(CustomerPortal):
     def _prepare_portal_layout_values(self):
         values = super()._prepare_portal_layout_values()
         partner = request.env.user.partner_id
-        p_count = request.env['ojt.participant'].sudo().search_count([
-            ('partner_id', '=', partner.id)
-        ])
+        p_count = request.env['ojt.participant']._portal_participant_count(partner.id)
         values.update({'ojt_participant_count': p_count})
         return values
 
     # Portal: list participant records for current partner with pager
-    @http.route(['/my/ojt'], type='http', auth='user', website=True)
+    @http.route(['/my/ojt', '/my/ojt/page/<int:page>'], type='http', auth='user', website=True)
     def portal_my_ojt(self, page=1, **kw):
         partner = request.env.user.partner_id
         Participant = request.env['ojt.participant'].sudo()
@@ -36,42 +41,125 @@ class OjtPortal(CustomerPortal):
         })
         return request.render('solvera_ojt_core.portal_my_ojt_dashboard', values)
 
-    # Portal: participant detail with portal access guard and optional return URL
-    @http.route(['/my/ojt/participant/<int:participant_id>'], type='http', auth='user', website=True)
-    def portal_my_ojt_participant_detail(self, participant_id=None, **kw):
+    # Helper: participant visible to the current user (portal users only see their own)
+    def _ojt_portal_participant(self, participant_id):
         user = request.env.user
-        partner = user.partner_id
-
-        Participant = request.env['ojt.participant'].sudo()
-        Submission = request.env['ojt.submission'].sudo()
-        Attendance = request.env['ojt.attendance'].sudo()
-        Certificate = request.env['ojt.certificate'].sudo()
-
-        # Domain: restrict to own record for portal users
         domain = [('id', '=', participant_id)]
         is_portal_user = user.has_group('base.group_portal') and not user.has_group('base.group_user')
         if is_portal_user:
-            domain.append(('partner_id', '=', partner.id))
-
-        participant = Participant.search(domain, limit=1)
+            domain.append(('partner_id', '=', user.partner_id.id))
+        return request.env['ojt.participant'].sudo().search(domain, limit=1)
+
+    # Helper: positive int from a query argument
+    def _ojt_int_arg(self, value, default):
+        try:
+            return max(1, int(value))
+        except (TypeError, ValueError):
+            return default
+
+    # Portal: participant detail, each section paginated on its own, optional return URL
+    @http.route([
+        '/my/ojt/participant/<int:participant_id>',
+        '/my/ojt/participant/<int:participant_id>/<string:section>',
+        '/my/ojt/participant/<int:participant_id>/<string:section>/page/<int:page>',
+    ], type='http', auth='user', website=True)
+    def portal_my_ojt_participant_detail(self, participant_id=None, section=None, page=1, **kw):
+        if section and section not in SECTION_PAGE_ARGS:
+            return request.not_found()
+        participant = self._ojt_portal_participant(participant_id)
         if not participant:
             return request.not_found()
 
-        submissions = Submission.search([('participant_id', '=', participant.id)], order="create_date desc, id desc")
-        attendance = Attendance.search([('participant_id', '=', participant.id)], order="id desc")
-        certificates = Certificate.search([('participant_id', '=', participant.id)], order="create_date desc, id desc")
+        # Sections: cached joined projections (see ojt.participant._portal_sections)
+        sections = participant._portal_sections()
+        ret = request.params.get('ret')  # Pass-through return URL parameter
+        pages = {name: self._ojt_int_arg(kw.get(arg), 1) for name, arg in SECTION_PAGE_ARGS.items()}
+        if section:
+            pages[section] = self._ojt_int_arg(page, 1)
 
         values = self._prepare_portal_layout_values()
         values.update({
             'participant': participant,
-            'submissions': submissions,
-            'attendance': attendance,
-            'certificates': certificates,
             'page_name': 'ojt',
-            'ret': request.params.get('ret'),  # Pass-through return URL parameter
+            'ret': ret,
         })
+        for name in SECTION_PAGE_ARGS:
+            rows = getattr(sections, name)
+            # keep the other sections on their current page
+            url_args = {arg: pages[other] for other, arg in SECTION_PAGE_ARGS.items() if other != name and pages[other] > 1}
+            if ret:
+                url_args['ret'] = ret
+            pager = portal_pager(
+                url='/my/ojt/participant/%s/%s' % (participant.id, name),
+                total=len(rows), page=pages[name], step=SECTION_STEP, url_args=url_args,
+            )
+            values[name] = rows[pager['offset']:pager['offset'] + SECTION_STEP]
+            values['%s_pager' % name] = pager
         return request.render('solvera_ojt_core.portal_my_ojt_participant_detail', values)
 
+    # Helper: keyset cursor "<create_date iso>_<id>" (microseconds kept so ties stay ordered)
+    def _ojt_encode_cursor(self, row):
+        return '%s_%s' % (row.create_date.isoformat(), row.id)
+
+    def _ojt_decode_cursor(self, cursor):
+        try:
+            stamp, rec_id = cursor.rsplit('_', 1)
+            return datetime.fromisoformat(stamp), int(rec_id)
+        except (AttributeError, ValueError):
+            return None
+
+    # Portal JSON: attendance/submission rows on demand, keyset paginated on (create_date, id)
+    @http.route(['/my/ojt/participant/<int:participant_id>/json/<string:section>'], type='http', auth='user', website=True, sitemap=False)
+    def portal_my_ojt_participant_rows(self, participant_id=None, section=None, after=None, limit=SECTION_STEP, **kw):
+        """?after=<next_cursor>&limit=20 -> {"rows": [...], "next_cursor": str|null}"""
+        if section not in JSON_SECTIONS:
+            return request.not_found()
+        participant = self._ojt_portal_participant(participant_id)
+        if not participant:
+            return request.not_found()
+        cursor = self._ojt_decode_cursor(after) if after else None
+        if after and not cursor:
+            return request.make_json_response({'error': 'invalid cursor'}, status=400)
+
+        limit = min(100, self._ojt_int_arg(limit, SECTION_STEP))
+        rows = participant._portal_rows(section, participant.id, request.env.lang or 'en_US', cursor=cursor, limit=limit + 1)
+        next_cursor = self._ojt_encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return request.make_json_response({
+            'rows': [
+                {key: (val.isoformat() if hasattr(val, 'isoformat') else val) for key, val in row._asdict().items()}
+                for row in rows[:limit]
+            ],
+            'next_cursor': next_cursor,
+        })
+
+    # Portal: download an issued certificate from the cached attachment (rendering stays in the cron)
+    @http.route(['/my/ojt/certificate/<int:certificate_id>/pdf'], type='http', auth='user', website=True)
+    def portal_my_ojt_certificate_pdf(self, certificate_id=None, **kw):
+        user = request.env.user
+        domain = [('id', '=', certificate_id), ('state', '=', 'issued')]
+        is_portal_user = user.has_group('base.group_portal') and not user.has_group('base.group_user')
+        if is_portal_user:
+            domain.append(('participant_id.partner_id', '=', user.partner_id.id))
+
+        certificate = request.env['ojt.certificate'].sudo().search(domain, limit=1)
+        if not certificate:
+            return request.not_found()
+
+        if certificate._pdf_stale():
+            certificate._queue_pdf_render()  # the render cron refreshes it; serve what we have meanwhile
+        if not certificate.with_context(bin_size=True).pdf_report:
+            return request.make_response(
+                _("Your certificate PDF is being generated. Please try again in a minute."),
+                headers=[('Content-Type', 'text/plain; charset=utf-8'), ('Retry-After', '60')],
+                status=202,
+            )
+        stream = request.env['ir.binary']._get_stream_from(
+            certificate, 'pdf_report',
+            filename='%s.pdf' % (certificate.serial_number or certificate.name),
+            mimetype='application/pdf',
+        )
+        return stream.get_response(as_attachment=True)
+
 
 from odoo.addons.website_hr_recruitment.controllers.main import WebsiteHrRecruitment
 
@@ -1,12 +1,24 @@
 
+from . import ojt_count_mixin
+from . import ojt_qr
+from . import ir_sequence_inherit
 from . import ojt_batch
 from . import hr_job_inherit
 from . import ojt_participant
 from . import ojt_event_link
+from . import ojt_event_link_qr_sheet
 from . import ojt_certificate
+from . import ojt_certificate_render
 from . import ojt_assignment
 from . import ojt_submission
 from . import ojt_attendance
+from . import ojt_attendance_audit
+from . import ojt_attendance_report
+from . import hr_recruitment_stage_inherit
 from . import hr_applicant_inherit
 from . import res_config_settings
-from . import ojt_participant_auto
\ No newline at end of file
+from . import ojt_participant_auto
+from . import ojt_participant_kpi
+from . import ojt_change_log
+from . import ojt_participant_progress
+from . import ojt_portal_data
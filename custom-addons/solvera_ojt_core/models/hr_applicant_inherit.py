@@ -1,50 +1,56 @@
 # -*- coding: utf-8 -*-
+import logging
+import time
+from collections import defaultdict
+
 from odoo import api, fields, models, _
 
+_logger = logging.getLogger(__name__)
+
 
 class HrApplicant(models.Model):
     _inherit = "hr.applicant"
 
     def _notify_stage_change(self, old_stage, new_stage):
-        """Send notification email to the applicant when the stage changes.
+        """Queue a notification email for every applicant in ``self``.
+
+        The template is rendered once per language for the whole group and the
+        mails go to the outgoing queue, sent in batches by the mail cron.
         If the mail template is missing, post a simple message instead.
         """
+        apps = self.filtered(lambda a: a.partner_id.email)
+        if not apps:
+            return
         template = self.env.ref("solvera_ojt_core.mail_tmpl_applicant_stage_default", raise_if_not_found=False)
-        for app in self:
-            partner = getattr(app, "partner_id", False)
-            if not partner or not partner.email:
-                continue
-            if template:
-                lang = partner.lang or self.env.user.lang
-                template.with_context(lang=lang).send_mail(
-                    app.id, force_send=True,
-                    email_values={"email_to": partner.email}
-                )
-            else:
+        if not template:
+            for app in apps.with_context(mail_notify_force_send=False):
                 app.message_post(
                     body=_("Your application moved to stage: %s") % (new_stage.name or ""),
                     message_type="comment",
-                    partner_ids=[partner.id],
+                    partner_ids=[app.partner_id.id],
                     subtype_xmlid="mail.mt_comment",
                     email_layout_xmlid="mail.mail_notification_light"
                 )
+            return
 
-    def _is_contract_signed_stage(self, stage):
-        """Return True only if the stage name clearly indicates 'Contract Signed'.
-        Excludes 'Proposal Contract' stages.
-        """
-        name = (stage.name or "").lower()
-        if not name:
-            return False
-        # Skip 'Proposal Contract' stages
-        if "proposal" in name:
-            return False
-        # Match: 'Kontrak Ditandatangani' / 'Contract Signed'
-        return (
-            ("kontrak" in name and any(k in name for k in ("ditandatangani", "ditandatangan")))
-            or ("contract" in name and "signed" in name)
+        started = time.perf_counter()
+        ids_by_lang = defaultdict(list)
+        for app in apps:
+            ids_by_lang[app.partner_id.lang or self.env.user.lang].append(app.id)
+        mails = self.env["mail.mail"]
+        for lang, app_ids in ids_by_lang.items():
+            mails |= template.with_context(lang=lang).send_mail_batch(app_ids, force_send=False)
+        rendered = time.perf_counter()
+        self.env.ref("mail.ir_cron_mail_scheduler_action")._trigger()
+        _logger.info(
+            "OJT stage notifications: %d mail(s) queued for stage %r, %d language group(s), rendered in %.0f ms",
+            len(mails), new_stage.name, len(ids_by_lang), (rendered - started) * 1000,
         )
 
+    def _is_contract_signed_stage(self, stage):
+        """Return True if applicants in this stage should become participants (stored on the stage)."""
+        return bool(stage.ojt_contract_signed)
+
     def _is_hired_stage(self, stage):
         """Backward compatibility alias for 'contract signed' stage check."""
         return self._is_contract_signed_stage(stage)
@@ -62,46 +68,60 @@ class HrApplicant(models.Model):
         # Detect stage change and prepare participant creation
         if "stage_id" in vals:
             new_stage = Stage.browse(vals["stage_id"])
-            for app in self:
-                stage_changed_ids.append(app.id)
-                if self._is_contract_signed_stage(new_stage):
-                    to_create_participant_ids.append(app.id)
+            stage_changed_ids = self.ids
+            if self._is_contract_signed_stage(new_stage):
+                to_create_participant_ids = self.ids
 
         # Perform standard write
         res = super().write(vals)
 
-        # Send email notifications for stage changes
+        # Queue email notifications for stage changes (one group per new stage)
         if stage_changed_ids:
             apps = self.browse(stage_changed_ids)
-            for app in apps:
-                self._notify_stage_change(old_stages.get(app.id), app.stage_id)
+            for stage in apps.stage_id:
+                group = apps.filtered(lambda a, stage=stage: a.stage_id == stage)
+                group._notify_stage_change(old_stages.get(group[:1].id), stage)
 
-        # Auto-create Participant when contract is signed
+        # Auto-create Participants when contract is signed
         if to_create_participant_ids:
-            apps = self.browse(to_create_participant_ids)
-            Batch = self.env["ojt.batch"]
-            Participant = self.env["ojt.participant"]
-            for app in apps:
-                if not app.job_id or not app.partner_id:
-                    continue
-                # Find batch linked to this job (1-1 mapping job <-> batch)
-                batch = Batch.search([("job_id", "=", app.job_id.id)], limit=1)
-                if not batch:
-                    continue
-                # Avoid duplicates (unique per batch + partner)
-                exists = Participant.search([
-                    ("batch_id", "=", batch.id),
-                    ("partner_id", "=", app.partner_id.id)
-                ], limit=1)
-                if exists:
-                    # Update applicant link if missing
-                    if not exists.applicant_id:
-                        exists.write({"applicant_id": app.id})
-                    continue
-                # Create new participant record
-                Participant.create({
-                    "batch_id": batch.id,
-                    "partner_id": app.partner_id.id,
-                    "applicant_id": app.id,
-                })
+            self.browse(to_create_participant_ids)._convert_to_participants()
         return res
+
+    def _convert_to_participants(self):
+        """Enroll these applicants in their job's OJT batch, set-based.
+
+        Batches come from the stored hr.job.ojt_batch_id link, existing (batch,
+        partner) pairs are read in one search and the missing participants
+        are created with a single create() (one attendance backfill).
+        Returns the created participants.
+        """
+        Participant = self.env["ojt.participant"]
+        apps = self.filtered(lambda a: a.job_id and a.partner_id)
+        if not apps:
+            return Participant
+        batch_by_job = {job.id: job.ojt_batch_id.id for job in apps.job_id if job.ojt_batch_id}
+        apps = apps.filtered(lambda a: a.job_id.id in batch_by_job)
+        if not apps:
+            return Participant
+
+        # Existing pairs (unique per batch + partner): only fill in a missing applicant link
+        existing = {
+            (p.batch_id.id, p.partner_id.id): p
+            for p in Participant.search([
+                ("batch_id", "in", list(set(batch_by_job.values()))),
+                ("partner_id", "in", apps.partner_id.ids),
+            ])
+        }
+        vals_list, queued = [], set()
+        for app in apps:
+            key = (batch_by_job[app.job_id.id], app.partner_id.id)
+            participant = existing.get(key)
+            if participant:
+                if not participant.applicant_id:
+                    participant.write({"applicant_id": app.id})
+                continue
+            if key in queued:  # same partner applied twice to this job
+                continue
+            queued.add(key)
+            vals_list.append({"batch_id": key[0], "partner_id": key[1], "applicant_id": app.id})
+        return Participant.create(vals_list) if vals_list else Participant
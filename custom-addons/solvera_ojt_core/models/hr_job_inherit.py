@@ -1,15 +1,26 @@
-from odoo import models, _
+from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
 
 class HrJob(models.Model):
     _inherit = "hr.job"
 
+    # Reverse link: the batch owning this job (ojt.batch.job_id is unique, so at most one)
+    ojt_batch_ids = fields.One2many("ojt.batch", "job_id", string="OJT Batches")
+    ojt_batch_id = fields.Many2one(
+        "ojt.batch", string="OJT Batch", compute="_compute_ojt_batch_id", store=True, index=True
+    )
+
+    # Compute: stored so guards and applicant conversion read it without searching batches
+    @api.depends("ojt_batch_ids")
+    def _compute_ojt_batch_id(self):
+        for rec in self:
+            rec.ojt_batch_id = rec.ojt_batch_ids[:1]
+
     def write(self, vals):
         # Guard: block direct edits for batch-controlled fields
         protected = {"name", "description", "no_of_recruitment"}
         if any(k in vals for k in protected) and not self.env.context.get("ojt_batch_sync"):
-            linked = self.env["ojt.batch"].sudo().search([("job_id", "in", self.ids)], limit=1)
-            if linked:
+            if self.sudo().ojt_batch_id:
                 raise ValidationError(_("Please edit Job Name/Description/Target via the related OJT Batch only."))
 
         # Guard: publishing allowed only when linked batch is 'ongoing' (unless triggered from batch sync)
@@ -18,8 +29,7 @@ class HrJob(models.Model):
             new_val = bool(vals[publish_keys[0]])
             if new_val:  # trying to set True
                 # If any linked batch not ongoing -> block
-                linked_batches = self.env["ojt.batch"].sudo().search([("job_id", "in", self.ids)])
-                for b in linked_batches:
+                for b in self.sudo().ojt_batch_id:
                     if b.state != "recruitment":
                         raise ValidationError(_("You can publish only when the related OJT Batch is Ongoing."))
 
@@ -0,0 +1,38 @@
+from odoo import api, fields, models
+
+
+class HrRecruitmentStage(models.Model):
+    _inherit = "hr.recruitment.stage"
+
+    # Flag: applicants reaching this stage become OJT participants (guessed from the name, editable)
+    ojt_contract_signed = fields.Boolean(
+        string="OJT Contract Signed",
+        compute="_compute_ojt_contract_signed",
+        store=True,
+        readonly=False,
+        help="Applicants moved to this stage are enrolled as participants of the job's OJT batch.",
+    )
+
+    # Compute: parse the stage name once, when it changes
+    @api.depends("name")
+    def _compute_ojt_contract_signed(self):
+        for rec in self:
+            names = {rec.name, rec.with_context(lang="en_US").name}
+            rec.ojt_contract_signed = any(self._is_contract_signed_name(name) for name in names)
+
+    @api.model
+    def _is_contract_signed_name(self, name):
+        """Return True only if the stage name clearly indicates 'Contract Signed'.
+        Excludes 'Proposal Contract' stages.
+        """
+        name = (name or "").lower()
+        if not name:
+            return False
+        # Skip 'Proposal Contract' stages
+        if "proposal" in name:
+            return False
+        # Match: 'Kontrak Ditandatangani' / 'Contract Signed'
+        return (
+            ("kontrak" in name and any(k in name for k in ("ditandatangani", "ditandatangan")))
+            or ("contract" in name and "signed" in name)
+        )
@@ -0,0 +1,46 @@
+from odoo import api, models
+
+
+class IrSequence(models.Model):
+    _inherit = "ir.sequence"
+
+    # Block: reserve `count` consecutive numbers with a single row update
+    def _next_block(self, count):
+        """Return `count` formatted values, drawn with one UPDATE (no_gap) or one nextval query (standard)."""
+        self.ensure_one()
+        if count <= 0:
+            return []
+        if self.use_date_range:
+            # Date-range sub-sequences keep their own counters; use the stock path
+            return [self._next() for _i in range(count)]
+
+        step = self.number_increment or 1
+        if self.implementation == "standard":
+            self.env.cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                ["ir_sequence_%03d" % self.id, count],
+            )
+            numbers = [r[0] for r in self.env.cr.fetchall()]
+        else:
+            self.flush_recordset(["number_next"])
+            self.env.cr.execute(
+                "UPDATE ir_sequence SET number_next = number_next + %s WHERE id = %s RETURNING number_next - %s",
+                [step * count, self.id, step * count],
+            )
+            first = self.env.cr.fetchone()[0]
+            self.invalidate_recordset(["number_next"])
+            numbers = [first + step * i for i in range(count)]
+        return [self.get_next_char(n) for n in numbers]
+
+    # Block: same lookup rules as next_by_code (company-specific first, then shared)
+    @api.model
+    def _next_block_by_code(self, sequence_code, count):
+        company_id = self.env.company.id
+        seq = self.search(
+            [("code", "=", sequence_code), ("company_id", "in", [company_id, False])],
+            order="company_id",
+            limit=1,
+        )
+        if not seq:
+            return [False] * count
+        return seq.sudo()._next_block(count)
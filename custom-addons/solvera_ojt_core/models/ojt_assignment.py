@@ -86,6 +86,22 @@ class OjtAssignment(models.Model):
             sub_cnt = len(rec.submission_ids)
             rec.submission_progress = round((sub_cnt / part_cnt * 100.0), 0) if part_cnt else 0.0
 
+    # Write: push weight/max_score/batch edits into the participant KPI store
+    def write(self, vals):
+        res = super().write(vals)
+        Participant = self.env["ojt.participant"]
+        if "batch_id" in vals or "max_score" in vals:
+            # max_score may cross 0, which adds or drops score rows: take the full refresh path
+            Participant._kpi_refresh_scores(self.submission_ids._kpi_pairs())
+        elif "weight" in vals:
+            Participant._kpi_reweight_assignments(self.ids)
+        return res
+
+    # Unlink: submissions and score rows cascade in SQL, so withdraw the scores first
+    def unlink(self):
+        self.env["ojt.participant"]._kpi_drop_assignments(self.ids)
+        return super().unlink()
+
     # Transition: to open
     def action_open(self):
         self.write({"state": "open"})
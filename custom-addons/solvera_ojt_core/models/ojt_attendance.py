@@ -1,7 +1,21 @@
 # -*- coding: utf-8 -*-
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
+from odoo.osv import expression
 from uuid import uuid4
+from collections import defaultdict
+from typing import NamedTuple
+import threading
+import time
+
+
+# Policy: typed attendance timing rules (minutes), global or per batch
+class AttendancePolicy(NamedTuple):
+    late_grace: int = 15
+    auto_absent_after: int = 45
+    auto_checkout_buffer: int = 5
+    early_checkin_open: int = 15
+    close_checkin_after_end: int = 0
 
 
 class OjtAttendance(models.Model):
@@ -40,7 +54,6 @@ class OjtAttendance(models.Model):
     qr_token = fields.Char(
         string="QR Token",
         copy=False,
-        index=True,
         readonly=True,
         default=lambda self: uuid4().hex,
         help="Unique token for QR/Join links.",
@@ -61,6 +74,7 @@ class OjtAttendance(models.Model):
 
     _sql_constraints = [
         ("uniq_participant_event", "unique(participant_id, event_link_id)", "Attendance already exists for this participant & event."),
+        ("uniq_qr_token", "unique(qr_token)", "QR Token must be unique."),
     ]
 
     # Compute: duration in minutes
@@ -88,14 +102,20 @@ class OjtAttendance(models.Model):
             rec.qr_url = f"{base}/ojt/q/{token}" if token else False
             rec.join_url = f"{base}/ojt/a/{token}" if token else False
 
+    # Helper: value encoded in the QR for a mode ("join" -> join link, otherwise check-in link)
+    def _qr_value(self, mode="checkin"):
+        self.ensure_one()
+        return (self.join_url if mode == "join" else self.qr_url) or ""
+
     # Onchange: infer presence from check-in vs start (+grace)
     @api.onchange("check_in", "event_link_id")
     def _onchange_presence(self):
+        policies = self._get_attendance_policies(self.batch_id._origin)
         for rec in self:
             if rec.check_in and rec.event_link_id and rec.event_link_id.date_start:
-                grace = self._get_param_int("ojt_late_grace_minutes", 15)
+                policy = policies[rec.batch_id._origin.id or 0]
                 present_limit = rec.event_link_id.date_start
-                late_limit = fields.Datetime.add(present_limit, minutes=grace)
+                late_limit = fields.Datetime.add(present_limit, minutes=policy.late_grace)
                 rec.presence = "present" if rec.check_in <= late_limit else "late"
 
     # Constraint: check-out must be >= check-in
@@ -114,13 +134,53 @@ class OjtAttendance(models.Model):
             if rec.event_link_id and rec.batch_id and rec.event_link_id.batch_id != rec.batch_id:
                 raise ValidationError(_("Event must belong to the selected Batch."))
 
+    # Create: feed participant KPI counters
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env["ojt.participant"]._kpi_apply_deltas(records._kpi_attendance_contrib())
+        return records
+
+    # Write: move KPI counters only when presence or participant changes
+    def write(self, vals):
+        if "presence" not in vals and "participant_id" not in vals:
+            return super().write(vals)
+        before = self._kpi_attendance_contrib(sign=-1)
+        res = super().write(vals)
+        deltas = self._kpi_attendance_contrib()
+        for pid, delta in before.items():
+            for fname, value in delta.items():
+                deltas[pid][fname] += value
+        self.env["ojt.participant"]._kpi_apply_deltas(deltas)
+        return res
+
+    # Unlink: withdraw KPI counters
+    def unlink(self):
+        deltas = self._kpi_attendance_contrib(sign=-1)
+        res = super().unlink()
+        self.env["ojt.participant"]._kpi_apply_deltas(deltas)
+        return res
+
+    # Helper: per-participant contribution to the KPI store
+    def _kpi_attendance_contrib(self, sign=1):
+        deltas = defaultdict(lambda: defaultdict(int))
+        for rec in self:
+            d = deltas[rec.participant_id.id]
+            d["kpi_total_count"] += sign
+            if rec.presence in ("present", "late"):
+                d["kpi_present_count"] += sign
+        return deltas
+
     # Action: ensure QR token exists
     def _ensure_token(self):
-        for rec in self.filtered(lambda r: not r.qr_token):
+        # rotating-session rows check in through the signed session code, never by token
+        for rec in self.filtered(lambda r: not r.qr_token and r.event_link_id.checkin_mode != "rotating"):
             rec.qr_token = uuid4().hex
 
     # Action: perform check-in and set presence
     def action_check_in(self, method="manual"):
+        checked_in = self.browse()
+        policies = self._get_attendance_policies(self.batch_id)
         for rec in self:
             now = fields.Datetime.now()
             if rec.check_in:
@@ -131,61 +191,257 @@ class OjtAttendance(models.Model):
 
             presence = "present"
             if rec.event_link_id and rec.event_link_id.date_start:
-                grace = self._get_param_int("ojt_late_grace_minutes", 15)
+                policy = policies[rec.batch_id.id or 0]
                 present_limit = rec.event_link_id.date_start
-                late_limit = fields.Datetime.add(present_limit, minutes=grace)
+                late_limit = fields.Datetime.add(present_limit, minutes=policy.late_grace)
                 presence = "present" if now <= late_limit else "late"
             rec.presence = presence
-
-            rec.message_post(
-                body=_("Checked in (%s). Presence: %s") % (rec.method, rec.presence),
-                subtype_xmlid="mail.mt_note",
-            )
+            checked_in |= rec
+        checked_in._log_attendance_event("check_in")
 
     # Action: perform check-out and log note
     def action_check_out(self, method="manual"):
+        checked_out = self.browse()
         for rec in self:
             if not rec.check_in or rec.check_out:
                 continue
             rec.method = method or rec.method or "manual"
             rec.check_out = fields.Datetime.now()
-            rec.message_post(body=_("Checked out (%s).") % rec.method, subtype_xmlid="mail.mt_note")
+            checked_out |= rec
+        checked_out._log_attendance_event("check_out")
+
+    # Helper: check-in window state for a session ("too_early", "closed" or None)
+    @api.model
+    def _check_in_window_state(self, date_start, date_end, now=None, policy=None):
+        now = now or fields.Datetime.now()
+        policy = policy or self._get_attendance_policy()
+        if date_start and now < fields.Datetime.subtract(date_start, minutes=policy.early_checkin_open):
+            return "too_early"
+        if date_end and now > fields.Datetime.add(date_end, minutes=policy.close_checkin_after_end):
+            return "closed"
+        return None
+
+    # Fast path: resolve token and check in with a single conditional UPDATE
+    @api.model
+    def _fast_check_in(self, token, method="qr", attendance_id=None):
+        """Check in by QR token (or an already resolved ``attendance_id``) without the ORM.
+
+        The UPDATE only matches rows that are still open (check_in IS NULL), so
+        concurrent scans of the same token record exactly one check-in.
+        Tokens only check in on per-participant sessions; shared and rotating
+        sessions go through the session code instead.
+        Returns a dict with ``status`` (not_found, session_code, too_early,
+        closed, already, checked_in) and the session data the controller needs.
+        """
+        cr = self.env.cr
+        cr.execute(
+            """
+            SELECT a.id, a.batch_id, a.check_in, a.event_link_id, a.participant_id, a.presence,
+                   e.checkin_mode, e.date_start, e.date_end, e.online_meeting_url, b.write_date AS batch_revision
+              FROM ojt_attendance a
+         LEFT JOIN ojt_event_link e ON e.id = a.event_link_id
+         LEFT JOIN ojt_batch b ON b.id = a.batch_id
+             WHERE %s
+            """ % ("a.id = %s" if attendance_id else "a.qr_token = %s"),
+            [attendance_id or token],
+        )
+        row = cr.dictfetchone()
+        if not row:
+            return {"status": "not_found"}
+        if not attendance_id and row["checkin_mode"] not in (None, "participant"):
+            return {"status": "session_code", "attendance_id": row["id"], "date_start": row["date_start"]}
+
+        now = fields.Datetime.now()
+        result = {
+            "status": "already",
+            "attendance_id": row["id"],
+            "date_start": row["date_start"],
+            "online_meeting_url": row["online_meeting_url"],
+        }
+        policy = self._attendance_policy_for(row["batch_id"] or 0, row["batch_revision"])
+        window = self._check_in_window_state(row["date_start"], row["date_end"], now, policy)
+        if window:
+            result["status"] = window
+            return result
+        if row["check_in"]:
+            return result
+
+        presence = "present"
+        if row["date_start"]:
+            late_limit = fields.Datetime.add(row["date_start"], minutes=policy.late_grace)
+            presence = "present" if now <= late_limit else "late"
+
+        cr.execute(
+            """
+            UPDATE ojt_attendance
+               SET check_in = %(now)s,
+                   presence = %(presence)s,
+                   method = %(method)s,
+                   attendance_percent = 100.0,
+                   write_uid = %(uid)s,
+                   write_date = %(now)s
+             WHERE id = %(id)s AND check_in IS NULL
+         RETURNING id
+            """,
+            {"now": now, "presence": presence, "method": method or "qr", "uid": self.env.uid, "id": row["id"]},
+        )
+        if not cr.fetchone():
+            # Lost the race against a concurrent scan of the same token
+            return result
+
+        att = self.browse(row["id"])
+        att.invalidate_recordset(["check_in", "presence", "method", "attendance_percent", "write_uid", "write_date"])
+        att.modified(["check_in", "presence", "method"])
+        if row["presence"] not in ("present", "late"):
+            self.env["ojt.participant"]._kpi_apply_deltas({row["participant_id"]: {"kpi_present_count": 1}})
+        self.env["ojt.attendance.audit"]._enqueue("check_in", [(att.id, row["event_link_id"], method or "qr", presence)])
+        self.env["ojt.participant"]._portal_touch([row["participant_id"]])
+        self.env["ojt.change.log"]._log(
+            self._name, [att.id], "write", ("check_in", "presence", "method", "attendance_percent")
+        )
+        result["status"] = "checked_in"
+        return result
+
+    # Helper: buffer chatter events for these records (flushed by cron)
+    def _log_attendance_event(self, event):
+        self.env["ojt.attendance.audit"]._enqueue(
+            event, [(rec.id, rec.event_link_id.id, rec.method, rec.presence) for rec in self]
+        )
 
     # Cron: mark as absent after start + threshold if not checked in
     @api.model
     def _cron_mark_absent(self):
         """Set presence to 'absent' after start + buffer when no check-in."""
-        after = self._get_param_int("ojt_auto_absent_after_minutes", 45)
         now = fields.Datetime.now()
-        Attendance = self.env["ojt.attendance"].sudo()
         domain = [
             ("check_in", "=", False),
             ("presence", "!=", "absent"),
             ("event_link_id.date_start", "!=", False),
-            ("event_link_id.date_start", "<=", fields.Datetime.subtract(now, minutes=after)),
-        ]
-        records = Attendance.search(domain, limit=1000)
-        for rec in records:
-            rec.write({"presence": "absent", "method": "cron"})
-            rec.message_post(body=_("Auto-marked Absent by system."), subtype_xmlid="mail.mt_note")
+        ] + self._policy_domain(lambda policy: [
+            ("event_link_id.date_start", "<=", fields.Datetime.subtract(now, minutes=policy.auto_absent_after)),
+        ])
+
+        def mark_absent(records):
+            records.write({"presence": "absent", "method": "cron"})
+            records._log_attendance_event("absent")
+
+        self._cron_process_in_chunks(domain, mark_absent)
 
     # Cron: auto checkout at event end + buffer
     @api.model
     def _cron_auto_checkout(self):
         """Checkout attendees at event end + buffer when still open."""
-        buf = self._get_param_int("ojt_auto_checkout_buffer_minutes", 5)
         now = fields.Datetime.now()
-        Attendance = self.env["ojt.attendance"].sudo()
         domain = [
             ("check_in", "!=", False),
             ("check_out", "=", False),
             ("event_link_id.date_end", "!=", False),
-            ("event_link_id.date_end", "<=", fields.Datetime.subtract(now, minutes=buf)),
-        ]
-        records = Attendance.search(domain, limit=1000)
-        for rec in records:
-            rec.write({"check_out": rec.event_link_id.date_end, "method": rec.method or "cron"})
-            rec.message_post(body=_("Auto check-out by system."), subtype_xmlid="mail.mt_note")
+        ] + self._policy_domain(lambda policy: [
+            ("event_link_id.date_end", "<=", fields.Datetime.subtract(now, minutes=policy.auto_checkout_buffer)),
+        ])
+
+        def auto_checkout(records):
+            # one write per session: all rows of a session share the same end time
+            for link, recs in records.grouped("event_link_id").items():
+                late = recs.filtered(lambda r: r.check_in > link.date_end)
+                (recs - late).write({"check_out": link.date_end})
+                # checked in after the end (late scan or dates edited since): close at check-in
+                for rec in late:
+                    rec.write({"check_out": rec.check_in})
+            records._log_attendance_event("auto_checkout")
+
+        self._cron_process_in_chunks(domain, auto_checkout)
+
+    # Cron engine: drain a backlog chunk by chunk within the worker time budget
+    @api.model
+    def _cron_process_in_chunks(self, domain, process_chunk, chunk_size=500):
+        """Apply ``process_chunk`` to every record matching ``domain``.
+
+        ``process_chunk`` must move the records out of ``domain``. Each chunk is
+        committed on its own; when the time budget runs out the remaining count
+        is reported to ir.cron so the scheduler picks the job up again.
+        """
+        Attendance = self.env["ojt.attendance"].sudo()
+        deadline = time.monotonic() + self._cron_time_budget()
+        auto_commit = not getattr(threading.current_thread(), "testing", False)
+        done = 0
+        while True:
+            records = Attendance.search(domain, order="id", limit=chunk_size)
+            if not records:
+                break
+            process_chunk(records)
+            done += len(records)
+            if auto_commit:
+                self.env.cr.commit()
+            if time.monotonic() >= deadline:
+                break
+        remaining = Attendance.search_count(domain) if records else 0
+        self.env["ir.cron"]._notify_progress(done=done, remaining=remaining)
+        return done
+
+    # Util: seconds a cron run may spend before yielding (half of the real-time limit)
+    @api.model
+    def _cron_time_budget(self):
+        limit = tools.config.get("limit_time_real_cron") or -1
+        if limit < 0:
+            limit = tools.config.get("limit_time_real") or 120
+        if limit == 0:
+            limit = 600
+        return limit * 0.5
+
+    # Policy: cached typed rules for a batch (global settings when not overridden)
+    @api.model
+    def _get_attendance_policy(self, batch_id=None):
+        if not batch_id:
+            return self._attendance_policy_for(0, None)
+        return self._get_attendance_policies(self.env["ojt.batch"].browse(batch_id))[batch_id]
+
+    # Policy: {batch_id: policy} for many batches, plus 0 for the global rules
+    @api.model
+    def _get_attendance_policies(self, batches):
+        """Resolve each distinct batch once; callers index the result inside their loops.
+
+        The revision is the batch write_date read through the ORM cache (one
+        prefetched read, no flush): any batch write moves the cache key, so
+        saved overrides apply at once.
+        """
+        policies = {0: self._attendance_policy_for(0, None)}
+        for batch in batches.sudo():
+            policies[batch.id] = self._attendance_policy_for(batch.id, batch.write_date)
+        return policies
+
+    @api.model
+    @tools.ormcache("batch_id", "revision")
+    def _attendance_policy_for(self, batch_id, revision):
+        """Built once per (batch, write_date); settings saves clear it through ir.config_parameter."""
+        if batch_id:
+            batch = self.env["ojt.batch"].sudo().browse(batch_id).exists()
+            if batch and batch.attendance_policy_override:
+                return AttendancePolicy(
+                    late_grace=batch.late_grace_minutes,
+                    auto_absent_after=batch.auto_absent_after_minutes,
+                    auto_checkout_buffer=batch.auto_checkout_buffer_minutes,
+                    early_checkin_open=batch.early_checkin_open_minutes,
+                    close_checkin_after_end=batch.close_checkin_after_end_minutes,
+                )
+            return self._attendance_policy_for(0, None)
+        return AttendancePolicy(
+            late_grace=self._get_param_int("ojt_late_grace_minutes", 15),
+            auto_absent_after=self._get_param_int("ojt_auto_absent_after_minutes", 45),
+            auto_checkout_buffer=self._get_param_int("ojt_auto_checkout_buffer_minutes", 5),
+            early_checkin_open=self._get_param_int("ojt_early_checkin_open_minutes", 15),
+            close_checkin_after_end=self._get_param_int("ojt_close_checkin_after_end_minutes", 0),
+        )
+
+    # Policy: OR of per-policy domains (one per overriding batch, one for the rest)
+    @api.model
+    def _policy_domain(self, build):
+        overrides = self.env["ojt.batch"].sudo().search([("attendance_policy_override", "=", True)])
+        policies = self._get_attendance_policies(overrides)
+        domains = [[("batch_id", "=", batch.id)] + build(policies[batch.id]) for batch in overrides]
+        rest = [("batch_id", "not in", overrides.ids)] if overrides else []
+        domains.append(rest + build(policies[0]))
+        return expression.OR(domains)
 
     # Util: read int parameter safely
     @api.model
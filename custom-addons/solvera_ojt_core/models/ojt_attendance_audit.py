@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo import api, fields, models, _
+
+
+class OjtAttendanceAudit(models.Model):
+    _name = "ojt.attendance.audit"
+    _description = "OJT Attendance Audit Queue"
+    _order = "id"
+    _log_access = False
+
+    # Buffered event: flushed to chatter by cron, then deleted
+    attendance_id = fields.Many2one("ojt.attendance", string="Attendance", required=True, ondelete="cascade")
+    event_link_id = fields.Many2one("ojt.event.link", string="Event", ondelete="cascade")
+    event = fields.Selection(
+        [
+            ("check_in", "Check In"),
+            ("check_out", "Check Out"),
+            ("absent", "Auto Absent"),
+            ("auto_checkout", "Auto Checkout"),
+        ],
+        string="Event Type",
+        required=True,
+    )
+    method = fields.Char(string="Method")
+    presence = fields.Char(string="Presence")
+    logged_at = fields.Datetime(string="Logged At", required=True)
+
+    # Helper: configured log mode (record | digest | none)
+    @api.model
+    def _get_log_mode(self):
+        mode = self.env["ir.config_parameter"].sudo().get_param("ojt_attendance_log_mode", "record")
+        return mode if mode in ("record", "digest", "none") else "record"
+
+    # Queue: buffer events as (attendance_id, event_link_id, method, presence) rows
+    @api.model
+    def _enqueue(self, event, rows):
+        """Insert audit rows with one multi-row INSERT; no-op when logging is off."""
+        if not rows or self._get_log_mode() == "none":
+            return
+        now = fields.Datetime.now()
+        values = [(att_id, link_id or None, event, method, presence, now) for att_id, link_id, method, presence in rows]
+        self.env.cr.execute(
+            "INSERT INTO ojt_attendance_audit (attendance_id, event_link_id, event, method, presence, logged_at) VALUES "
+            + ", ".join(["%s"] * len(values)),
+            values,
+        )
+
+    # Helper: note body per event (same wording as the former inline notes)
+    @api.model
+    def _note_body(self, row):
+        event = row["event"]
+        if event == "check_in":
+            return _("Checked in (%s). Presence: %s") % (row["method"], row["presence"])
+        if event == "check_out":
+            return _("Checked out (%s).") % row["method"]
+        if event == "absent":
+            return _("Auto-marked Absent by system.")
+        return _("Auto check-out by system.")
+
+    # Cron: flush buffered events as bulk notes or digests
+    @api.model
+    def _cron_flush(self, limit=5000):
+        mode = self._get_log_mode()
+        cr = self.env.cr
+        cr.execute(
+            """
+            SELECT id, attendance_id, event_link_id, event, method, presence, logged_at
+              FROM ojt_attendance_audit
+          ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+            """,
+            [limit],
+        )
+        rows = cr.dictfetchall()
+        if not rows:
+            return
+
+        if mode == "record":
+            self._flush_per_record(rows)
+        elif mode == "digest":
+            self._flush_digest(rows)
+
+        cr.execute("DELETE FROM ojt_attendance_audit WHERE id = ANY(%s)", [[r["id"] for r in rows]])
+        if len(rows) == limit:
+            self.env.ref("solvera_ojt_core.ir_cron_ojt_attendance_audit_flush")._trigger()
+
+    # Flush: one note per attendance row, created with a single multi-create
+    def _flush_per_record(self, rows):
+        subtype = self.env.ref("mail.mt_note")
+        author = self.env.ref("base.partner_root")
+        self.env["mail.message"].sudo().create([
+            {
+                "model": "ojt.attendance",
+                "res_id": r["attendance_id"],
+                "message_type": "notification",
+                "subtype_id": subtype.id,
+                "author_id": author.id,
+                "date": r["logged_at"],
+                "body": self._note_body(r),
+            }
+            for r in rows
+        ])
+
+    # Flush: one digest note per event link (rows without a link fall back to per-record)
+    def _flush_digest(self, rows):
+        per_link = defaultdict(lambda: defaultdict(int))
+        orphans = []
+        for r in rows:
+            if not r["event_link_id"]:
+                orphans.append(r)
+                continue
+            counts = per_link[r["event_link_id"]]
+            counts[r["event"]] += 1
+            if r["event"] == "check_in" and r["presence"] == "late":
+                counts["late"] += 1
+        if orphans:
+            self._flush_per_record(orphans)
+        if not per_link:
+            return
+
+        subtype = self.env.ref("mail.mt_note")
+        author = self.env.ref("base.partner_root")
+        self.env["mail.message"].sudo().create([
+            {
+                "model": "ojt.event.link",
+                "res_id": link_id,
+                "message_type": "notification",
+                "subtype_id": subtype.id,
+                "author_id": author.id,
+                "body": _(
+                    "Attendance digest: %(check_in)s check-in(s) (%(late)s late), %(check_out)s check-out(s), "
+                    "%(absent)s auto-absent, %(auto_checkout)s auto check-out(s)."
+                ) % {
+                    "check_in": counts["check_in"],
+                    "late": counts["late"],
+                    "check_out": counts["check_out"],
+                    "absent": counts["absent"],
+                    "auto_checkout": counts["auto_checkout"],
+                },
+            }
+            for link_id, counts in per_link.items()
+        ])
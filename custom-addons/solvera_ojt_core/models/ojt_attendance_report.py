@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from odoo import api, fields, models
+from odoo.tools import sql
+
+WATERMARK_PARAM = "ojt_attendance_report_watermark"
+# Re-scan window before the watermark, for rows written by transactions that committed late
+WATERMARK_OVERLAP_MINUTES = 15
+REFRESH_CHUNK = 200
+
+# Facts per (batch, event link, day); {keys} joins the (batch_id, event_link_id or 0) pairs to refresh
+REFRESH_QUERY = """
+    INSERT INTO ojt_attendance_report (
+        batch_id, event_link_id, day, attendance_count, present_count, late_count, absent_count,
+        attended_count, attendance_percent_sum, attendance_percent, duration_minutes
+    )
+    SELECT a.batch_id, a.event_link_id,
+           COALESCE(e.date_start, a.check_in, a.create_date)::date,
+           COUNT(*),
+           COUNT(*) FILTER (WHERE a.presence = 'present'),
+           COUNT(*) FILTER (WHERE a.presence = 'late'),
+           COUNT(*) FILTER (WHERE a.presence = 'absent'),
+           COUNT(*) FILTER (WHERE a.presence IN ('present', 'late')),
+           COALESCE(SUM(a.attendance_percent), 0),
+           COALESCE(AVG(a.attendance_percent), 0),
+           COALESCE(SUM(a.duration_minutes), 0)
+      FROM ojt_attendance a
+      JOIN (VALUES {keys}) AS k(batch_id, event_link_id)
+        ON a.batch_id = k.batch_id AND COALESCE(a.event_link_id, 0) = k.event_link_id
+ LEFT JOIN ojt_event_link e ON e.id = a.event_link_id
+  GROUP BY 1, 2, 3
+"""
+
+
+class OjtAttendanceReport(models.Model):
+    _name = "ojt.attendance.report"
+    _description = "OJT Attendance Analytics"
+    _order = "day desc, batch_id, event_link_id"
+    _log_access = False
+
+    # Dimensions
+    batch_id = fields.Many2one("ojt.batch", string="Batch", readonly=True, ondelete="cascade", index=True)
+    event_link_id = fields.Many2one("ojt.event.link", string="Event", readonly=True, ondelete="cascade")
+    day = fields.Date(string="Day", readonly=True, index=True)
+
+    # Measures
+    attendance_count = fields.Integer(string="Attendance Rows", readonly=True)
+    present_count = fields.Integer(string="Present", readonly=True)
+    late_count = fields.Integer(string="Late", readonly=True)
+    absent_count = fields.Integer(string="Absent", readonly=True)
+    attended_count = fields.Integer(string="Attended", readonly=True, help="Present + Late.")
+    attendance_percent_sum = fields.Float(string="Attendance % (Sum)", readonly=True)
+    attendance_percent = fields.Float(
+        string="Attendance % (Avg per Session)", readonly=True, aggregator="avg",
+        help="Average attendance % of the session; grouped rows average the sessions, not the participants.",
+    )
+    duration_minutes = fields.Float(string="Duration (minutes)", readonly=True)
+
+    def init(self):
+        # Queue: pairs whose rows left them without touching write_date (unlink, moves)
+        self.env.cr.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ojt_attendance_report_queue (
+                batch_id INTEGER NOT NULL,
+                event_link_id INTEGER NOT NULL,
+                PRIMARY KEY (batch_id, event_link_id)
+            )
+            """
+        )
+        sql.create_index(self.env.cr, "ojt_attendance_report_key_idx", self._table, ["batch_id", "event_link_id"])
+        sql.create_index(self.env.cr, "ojt_attendance_write_date_idx", "ojt_attendance", ["write_date"])
+
+    # Dirty: queue these (batch_id, event_link_id) pairs for the next refresh
+    @api.model
+    def _mark_stale(self, pairs):
+        pairs = {(b, e or 0) for b, e in pairs if b}
+        if not pairs:
+            return
+        self.env.cr.execute(
+            "INSERT INTO ojt_attendance_report_queue (batch_id, event_link_id) VALUES "
+            + ", ".join(["%s"] * len(pairs))
+            + " ON CONFLICT DO NOTHING",
+            list(pairs),
+        )
+
+    # Refresh: rebuild the facts of some (batch_id, event_link_id or 0) pairs
+    @api.model
+    def _refresh_pairs(self, pairs):
+        if not pairs:
+            return
+        keys = ", ".join(["%s"] * len(pairs))
+        self.env.cr.execute(
+            f"""
+            DELETE FROM ojt_attendance_report_queue q
+             USING (VALUES {keys}) AS k(batch_id, event_link_id)
+             WHERE q.batch_id = k.batch_id AND q.event_link_id = k.event_link_id
+            """,
+            pairs,
+        )
+        self.env.cr.execute(
+            f"""
+            DELETE FROM ojt_attendance_report r
+             USING (VALUES {keys}) AS k(batch_id, event_link_id)
+             WHERE r.batch_id = k.batch_id AND COALESCE(r.event_link_id, 0) = k.event_link_id
+            """,
+            pairs,
+        )
+        self.env.cr.execute(REFRESH_QUERY.format(keys=keys), pairs)
+
+    # Refresh: pairs written since the watermark (or all of them) plus queued pairs
+    @api.model
+    def _dirty_pairs(self, since=None):
+        for model in ("ojt.attendance", "ojt.event.link"):
+            self.env[model].flush_model()
+        if since:
+            query, params = "SELECT batch_id, COALESCE(event_link_id, 0) FROM ojt_attendance WHERE write_date >= %s", [since]
+        else:
+            # full rebuild: also every existing fact, so facts without source rows are dropped
+            query, params = """
+                SELECT batch_id, COALESCE(event_link_id, 0) FROM ojt_attendance
+                 UNION
+                SELECT batch_id, COALESCE(event_link_id, 0) FROM ojt_attendance_report
+            """, []
+        self.env.cr.execute(
+            f"""
+            {query}
+             UNION
+            SELECT batch_id, event_link_id FROM ojt_attendance_report_queue
+            """,
+            params,
+        )
+        return sorted(self.env.cr.fetchall())
+
+    # Cron: incremental refresh, chunked and committed within the worker time budget
+    @api.model
+    def _cron_refresh(self, full=False):
+        """Re-aggregate the facts touched since the last run; the live table is only read per changed pair."""
+        ICP = self.env["ir.config_parameter"].sudo()
+        started = fields.Datetime.now()
+        watermark = None if full else ICP.get_param(WATERMARK_PARAM)
+        since = (
+            fields.Datetime.subtract(fields.Datetime.to_datetime(watermark), minutes=WATERMARK_OVERLAP_MINUTES)
+            if watermark else None
+        )
+        pairs = self._dirty_pairs(since)
+        deadline = time.monotonic() + self.env["ojt.attendance"]._cron_time_budget()
+        auto_commit = not getattr(threading.current_thread(), "testing", False)
+        done = 0
+        while done < len(pairs):
+            self._refresh_pairs(pairs[done:done + REFRESH_CHUNK])
+            done = min(len(pairs), done + REFRESH_CHUNK)
+            if auto_commit:
+                self.env.cr.commit()
+            if time.monotonic() >= deadline:
+                break
+        # Out of time: park the rest in the queue so the watermark can still move on
+        self._mark_stale(pairs[done:])
+        ICP.set_param(WATERMARK_PARAM, fields.Datetime.to_string(started))
+        self.invalidate_model()
+        self.env["ir.cron"]._notify_progress(done=done, remaining=len(pairs) - done)
+
+    # Action: rebuild every fact from the live table
+    @api.model
+    def action_rebuild(self):
+        self._cron_refresh(full=True)
+        return True
+
+
+class OjtAttendance(models.Model):
+    _inherit = "ojt.attendance"
+
+    # Hooks: rows leaving a fact do not show up through write_date
+    def write(self, vals):
+        if {"batch_id", "event_link_id"} & set(vals):
+            self.env["ojt.attendance.report"]._mark_stale(
+                (rec.batch_id.id, rec.event_link_id.id) for rec in self
+            )
+        return super().write(vals)
+
+    def unlink(self):
+        self.env["ojt.attendance.report"]._mark_stale(
+            {(rec.batch_id.id, rec.event_link_id.id) for rec in self}
+        )
+        return super().unlink()
+
+
+class OjtEventLink(models.Model):
+    _inherit = "ojt.event.link"
+
+    # Hooks: the session date is the fact's day; deleted links move rows to the "no event" fact
+    def write(self, vals):
+        res = super().write(vals)
+        if {"date_start", "batch_id"} & set(vals):
+            self.env["ojt.attendance.report"]._mark_stale((rec.batch_id.id, rec.id) for rec in self)
+        return res
+
+    def unlink(self):
+        self.env["ojt.attendance.report"]._mark_stale((rec.batch_id.id, 0) for rec in self)
+        return super().unlink()
+
+
+class OjtParticipant(models.Model):
+    _inherit = "ojt.participant"
+
+    # Hook: their attendance rows cascade in SQL, outside the attendance unlink hook
+    def unlink(self):
+        if self.ids:
+            self.env["ojt.attendance"].flush_model(["batch_id", "event_link_id", "participant_id"])
+            self.env.cr.execute(
+                "SELECT DISTINCT batch_id, event_link_id FROM ojt_attendance WHERE participant_id = ANY(%s)",
+                [self.ids],
+            )
+            self.env["ojt.attendance.report"]._mark_stale(self.env.cr.fetchall())
+        return super().unlink()
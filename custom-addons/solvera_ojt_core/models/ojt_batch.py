@@ -1,4 +1,9 @@
 # -*- coding: utf-8 -*-
+from collections import Counter, defaultdict
+from uuid import uuid4
+
+from markupsafe import Markup, escape
+
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
 
@@ -6,7 +11,7 @@ from odoo.exceptions import ValidationError
 class OjtBatch(models.Model):
     _name = "ojt.batch"
     _description = "OJT Batch"
-    _inherit = ["mail.thread", "mail.activity.mixin"]
+    _inherit = ["mail.thread", "mail.activity.mixin", "ojt.count.mixin"]
     _order = "start_date desc, id desc"
 
     # State: draft -> recruitment -> ongoing -> done/cancel
@@ -58,6 +63,14 @@ class OjtBatch(models.Model):
     attendance_threshold = fields.Float(string="Certificate Rule (Attendance %)", default=80.0)
     score_threshold = fields.Float(string="Certificate Rule (Score)", default=70.0)
 
+    # Rules (attendance timing; override the global OJT settings when enabled)
+    attendance_policy_override = fields.Boolean(string="Custom Attendance Rules")
+    late_grace_minutes = fields.Integer(string="Late Grace (minutes)", default=15)
+    auto_absent_after_minutes = fields.Integer(string="Auto Absent After (minutes)", default=45)
+    auto_checkout_buffer_minutes = fields.Integer(string="Auto Checkout Buffer (minutes)", default=5)
+    early_checkin_open_minutes = fields.Integer(string="Early Check-in Open (minutes)", default=15)
+    close_checkin_after_end_minutes = fields.Integer(string="Close Check-in After End (minutes)", default=0)
+
     # Publish (mirror hr.job; controlled by state)
     is_published = fields.Boolean(
         string="Published", compute="_compute_is_published", inverse="_inverse_is_published", store=False
@@ -86,11 +99,10 @@ class OjtBatch(models.Model):
         for rec in self:
             rec.capacity = rec.job_id.no_of_recruitment if rec.job_id else 0
 
-    # Inverse: push capacity to hr.job
+    # Inverse: push capacity to hr.job (create/write sync it themselves)
     def _inverse_capacity(self):
-        for rec in self:
-            if rec.job_id:
-                rec.job_id.with_context(ojt_batch_sync=True).write({"no_of_recruitment": rec.capacity or 0})
+        if not self.env.context.get("ojt_defer_job_sync"):
+            self._sync_jobs({rec: {"no_of_recruitment": rec.capacity or 0} for rec in self})
 
     # Compute: mirror description from hr.job
     @api.depends("job_id")
@@ -98,11 +110,10 @@ class OjtBatch(models.Model):
         for rec in self:
             rec.description = rec.job_id.description if rec.job_id else False
 
-    # Inverse: push description to hr.job
+    # Inverse: push description to hr.job (create/write sync it themselves)
     def _inverse_description(self):
-        for rec in self:
-            if rec.job_id:
-                rec.job_id.with_context(ojt_batch_sync=True).write({"description": rec.description or False})
+        if not self.env.context.get("ojt_defer_job_sync"):
+            self._sync_jobs({rec: {"description": rec.description or False} for rec in self})
 
     # Helper: resolve publish field on hr.job (new/legacy)
     def _job_publish_field_name(self):
@@ -120,14 +131,30 @@ class OjtBatch(models.Model):
         for rec in self:
             rec.is_published = bool(rec.job_id[fname]) if rec.job_id and fname else False
 
-    # Inverse: enforce state rule and push publish flag
+    # Inverse: enforce state rule and push publish flag (create/write sync it themselves)
     def _inverse_is_published(self):
+        if self.env.context.get("ojt_defer_job_sync"):
+            return
         fname = self._job_publish_field_name()
-        for rec in self:
-            if rec.job_id and fname:
-                if bool(rec.is_published) and rec.state != "recruitment":
-                    raise ValidationError(_("You can publish only when the batch status is Recruitment."))
-                rec.job_id.with_context(ojt_batch_sync=True).write({fname: bool(rec.is_published)})
+        if fname:
+            self._check_publish_state(self.filtered("is_published"))
+            self._sync_jobs({rec: {fname: bool(rec.is_published)} for rec in self})
+
+    # Constraint: publishing is only allowed while recruiting
+    @api.model
+    def _check_publish_state(self, batches):
+        if any(rec.job_id and rec.state != "recruitment" for rec in batches):
+            raise ValidationError(_("You can publish only when the batch status is Recruitment."))
+
+    # Sync: push {batch: job values} to the linked jobs, one write per distinct value set
+    def _sync_jobs(self, job_vals_by_batch):
+        groups = defaultdict(list)
+        for rec, job_vals in job_vals_by_batch.items():
+            if rec.job_id and job_vals:
+                groups[tuple(sorted(job_vals.items()))].append(rec.job_id.id)
+        Job = self.env["hr.job"].with_context(ojt_batch_sync=True)
+        for items, job_ids in groups.items():
+            Job.browse(job_ids).write(dict(items))
 
     # Compute: date-based progress %
     @api.depends("start_date", "end_date")
@@ -141,55 +168,37 @@ class OjtBatch(models.Model):
             elapsed = (min(today, rec.end_date) - rec.start_date).days
             rec.progress_ratio = max(0.0, min(100.0, (elapsed / total) * 100.0))
 
-    # Compute: smart-button counters
+    # Compute: smart-button counters (one grouped query per target model)
     def _compute_counts(self):
-        Cert = self.env["ojt.certificate"]
-        for rec in self:
-            rec.participants_count = len(rec.participant_ids)
-            rec.events_count = len(rec.event_link_ids)
-            rec.assignments_count = len(rec.assignment_ids)
-            rec.attendance_count = len(rec.attendance_ids)
-            if "batch_id" in Cert._fields:
-                rec.certificates_count = Cert.search_count([("batch_id", "=", rec.id)])
-            elif "participant_id" in Cert._fields:
-                rec.certificates_count = Cert.search_count([("participant_id.batch_id", "=", rec.id)])
-            else:
-                rec.certificates_count = 0
-
-    # Helper: auto-unpublish when leaving recruitment
-    def _auto_unpublish_if_needed(self):
-        """Unpublish linked Job when state is not 'recruitment'."""
-        fname = self._job_publish_field_name()
+        ids = self._origin.ids
+        participants = self._grouped_counts("ojt.participant", "batch_id", ids)
+        events = self._grouped_counts("ojt.event.link", "batch_id", ids)
+        assignments = self._grouped_counts("ojt.assignment", "batch_id", ids)
+        attendance = self._grouped_counts("ojt.attendance", "batch_id", ids)
+        certificates = self._grouped_counts("ojt.certificate", "batch_id", ids)
         for rec in self:
-            if rec.state != "recruitment" and fname and rec.job_id:
-                try:
-                    if bool(rec.job_id[fname]):
-                        rec.job_id.with_context(ojt_batch_sync=True).write({fname: False})
-                except Exception:
-                    rec.job_id.with_context(ojt_batch_sync=True).write({fname: False})
+            bid = rec._origin.id
+            rec.participants_count = participants.get(bid, 0)
+            rec.events_count = events.get(bid, 0)
+            rec.assignments_count = assignments.get(bid, 0)
+            rec.attendance_count = attendance.get(bid, 0)
+            rec.certificates_count = certificates.get(bid, 0)
 
     # Action: move to recruitment
     def action_set_recruitment(self):
-        for rec in self:
-            rec.state = "recruitment"
+        self.write({"state": "recruitment"})
 
-    # Action: start program (ongoing) and unpublish if needed
+    # Action: start program (ongoing); write() unpublishes the job
     def action_set_ongoing(self):
-        for rec in self:
-            rec.state = "ongoing"
-        self._auto_unpublish_if_needed()
+        self.write({"state": "ongoing"})
 
-    # Action: close program (done) and unpublish if needed
+    # Action: close program (done); write() unpublishes the job
     def action_set_done(self):
-        for rec in self:
-            rec.state = "done"
-        self._auto_unpublish_if_needed()
+        self.write({"state": "done"})
 
-    # Action: cancel program and unpublish if needed
+    # Action: cancel program; write() unpublishes the job
     def action_set_cancel(self):
-        for rec in self:
-            rec.state = "cancel"
-        self._auto_unpublish_if_needed()
+        self.write({"state": "cancel"})
 
     # Constraint: start_date <= end_date
     @api.constrains("start_date", "end_date")
@@ -209,60 +218,277 @@ class OjtBatch(models.Model):
                 if val is not None and (val < 0.0 or val > 100.0):
                     raise ValidationError(_("%s must be within 0..100.") % label)
 
-    # Create: assign sequence, ensure/create linked hr.job, initial sync
+    # Create: assign sequences, create missing hr.jobs, then one create and one job sync
     @api.model_create_multi
     def create(self, vals_list):
-        IrSequence = self.env["ir.sequence"]
-        HrJob = self.env["hr.job"]
-        new_records = self.browse()
-        for vals in vals_list:
-            if not vals.get("code") or vals.get("code") == _("New"):
-                vals["code"] = IrSequence.next_by_code("ojt.batch.seq") or _("New")
-            job_id = vals.get("job_id")
-            name = vals.get("name")
-            if not job_id:
-                if not name:
-                    raise ValidationError(_("Batch Name is required to create a linked Job."))
-                jvals = {"name": name}
-                if "description" in vals:
-                    jvals["description"] = vals.get("description")
-                if "capacity" in vals:
-                    jvals["no_of_recruitment"] = vals.get("capacity") or 0
-                job = HrJob.sudo().create(jvals)
-                vals["job_id"] = job.id
-            else:
-                if name:
-                    self.env["hr.job"].browse(job_id).with_context(ojt_batch_sync=True).write({"name": name})
-            new_records |= super(OjtBatch, self).create([vals])
-        return new_records
-
-    # Write: guard publish on state, keep hr.job in sync
-    def write(self, vals):
-        leaving_ids = set()
-        if "state" in vals:
-            new_state = vals.get("state")
-            for rec in self:
-                if new_state != "recruitment":
-                    fname = rec._job_publish_field_name()
-                    if fname and rec.job_id and bool(rec.job_id[fname]):
-                        leaving_ids.add(rec.id)
-        res = super().write(vals)
-        if leaving_ids:
-            for rec in self.browse(list(leaving_ids)):
-                fname = rec._job_publish_field_name()
-                if fname and rec.job_id:
-                    rec.job_id.with_context(ojt_batch_sync=True).write({fname: False})
-        for rec in self:
-            if "name" in vals and rec.job_id:
-                rec.job_id.with_context(ojt_batch_sync=True).write({"name": rec.name})
-            if "capacity" in vals:
-                rec._inverse_capacity()
+        new_code = [vals for vals in vals_list if not vals.get("code") or vals.get("code") == _("New")]
+        codes = self.env["ir.sequence"]._next_block_by_code("ojt.batch.seq", len(new_code))
+        for vals, code in zip(new_code, codes):
+            vals["code"] = code or _("New")
+
+        # Jobs: one create for every batch without a job
+        linked = [bool(vals.get("job_id")) for vals in vals_list]
+        jobless = [vals for vals in vals_list if not vals.get("job_id")]
+        if any(not vals.get("name") for vals in jobless):
+            raise ValidationError(_("Batch Name is required to create a linked Job."))
+        job_vals_list = []
+        for vals in jobless:
+            jvals = {"name": vals["name"]}
             if "description" in vals:
-                rec._inverse_description()
-            if "is_published" in vals:
-                rec._inverse_is_published()
+                jvals["description"] = vals.get("description")
+            if "capacity" in vals:
+                jvals["no_of_recruitment"] = vals.get("capacity") or 0
+            job_vals_list.append(jvals)
+        for vals, job in zip(jobless, self.env["hr.job"].sudo().create(job_vals_list)):
+            vals["job_id"] = job.id
+
+        records = super(OjtBatch, self.with_context(ojt_defer_job_sync=True)).create(vals_list)
+        records = records.with_env(self.env)
+        fname = self._job_publish_field_name()
+        job_vals_by_batch = {}
+        for rec, vals, had_job in zip(records, vals_list, linked):
+            job_vals = {}
+            if had_job:  # existing jobs follow the batch name, capacity and description
+                job_vals.update(rec._job_sync_vals(vals, fname, with_name=bool(vals.get("name"))))
+            elif "is_published" in vals and fname:
+                job_vals[fname] = bool(vals["is_published"])
+            job_vals_by_batch[rec] = job_vals
+        self._check_publish_state(records.filtered(lambda r: job_vals_by_batch[r].get(fname)))
+        records._sync_jobs(job_vals_by_batch)
+        return records
+
+    # Sync: job values implied by a batch ``vals`` dict, read back from the written record
+    def _job_sync_vals(self, vals, fname, with_name=True):
+        self.ensure_one()
+        job_vals = {}
+        if with_name and "name" in vals:
+            job_vals["name"] = self.name
+        if "capacity" in vals:
+            job_vals["no_of_recruitment"] = self.capacity or 0
+        if "description" in vals:
+            job_vals["description"] = self.description or False
+        if "is_published" in vals and fname:
+            job_vals[fname] = bool(vals["is_published"])
+        return job_vals
+
+    # Write: guard publish on state, keep hr.job in sync with one collected diff
+    def write(self, vals):
+        fname = self._job_publish_field_name()
+        leaving = self.browse()
+        if "state" in vals and vals["state"] != "recruitment" and fname:
+            leaving = self.filtered(lambda r: r.job_id[fname])
+        res = super(OjtBatch, self.with_context(ojt_defer_job_sync=True)).write(vals)
+        job_vals_by_batch = {rec: rec._job_sync_vals(vals, fname) for rec in self}
+        if fname:
+            self._check_publish_state(self.filtered(lambda r: job_vals_by_batch[r].get(fname)))
+            for rec in leaving:
+                job_vals_by_batch[rec][fname] = False
+        self._sync_jobs(job_vals_by_batch)
         return res
 
+    # Attendance grid: insert every missing participant x session row in one statement
+    def _materialize_attendance_grid(self, participant_ids=None, event_link_ids=None):
+        """Create missing attendance rows (absent, with a fresh QR token) for these batches.
+
+        Optionally restricted to some participants or event links. Existing
+        (participant, event) pairs are skipped by ON CONFLICT, so the call is
+        idempotent and safe to run concurrently. Returns the number of rows inserted.
+        """
+        if not self:
+            return 0
+        self.env["ojt.participant"].flush_model(["batch_id"])
+        self.env["ojt.event.link"].flush_model(["batch_id"])
+        where = ["e.batch_id = ANY(%(batch_ids)s)"]
+        params = {"batch_ids": self.ids, "uid": self.env.uid, "now": fields.Datetime.now()}
+        if participant_ids is not None:
+            where.append("p.id = ANY(%(participant_ids)s)")
+            params["participant_ids"] = list(participant_ids)
+        if event_link_ids is not None:
+            where.append("e.id = ANY(%(event_link_ids)s)")
+            params["event_link_ids"] = list(event_link_ids)
+
+        self.env.cr.execute(
+            f"""
+            INSERT INTO ojt_attendance (
+                batch_id, event_link_id, participant_id, presence, method, qr_token,
+                duration_minutes, attendance_percent, create_uid, create_date, write_uid, write_date
+            )
+            SELECT e.batch_id, e.id, p.id, 'absent', 'manual',
+                   CASE WHEN e.checkin_mode = 'rotating' THEN NULL ELSE replace(gen_random_uuid()::text, '-', '') END,
+                   0.0, 0.0, %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM ojt_event_link e
+              JOIN ojt_participant p ON p.batch_id = e.batch_id
+             WHERE {" AND ".join(where)}
+            ON CONFLICT (participant_id, event_link_id) DO NOTHING
+         RETURNING id, participant_id
+            """,
+            params,
+        )
+        rows = self.env.cr.fetchall()
+        inserted = Counter(r[1] for r in rows)
+        if not inserted:
+            return 0
+
+        self.env["ojt.attendance"].invalidate_model()
+        self.env["ojt.participant"].invalidate_model(["attendance_ids"])
+        self.env["ojt.batch"].invalidate_model(["attendance_ids"])
+        self.env["ojt.participant"]._kpi_apply_deltas(
+            {pid: {"kpi_total_count": count} for pid, count in inserted.items()}
+        )
+        self.env["ojt.participant"]._portal_touch(inserted.keys())
+        self.env["ojt.change.log"]._log("ojt.attendance", [r[0] for r in rows], "create")
+        return sum(inserted.values())
+
+    # Action: generate the full attendance grid for the batch
+    def action_materialize_attendance_grid(self):
+        for rec in self:
+            count = rec.sudo()._materialize_attendance_grid()
+            rec.message_post(body=_("Attendance grid synced: %s new row(s).") % count)
+        return True
+
+    # Action: bulk SQL recompute of participant KPIs for the whole batch
+    def action_recompute_kpis(self):
+        Participant = self.env["ojt.participant"].sudo()
+        for rec in self:
+            participants = Participant.search([("batch_id", "=", rec.id)])
+            participants._kpi_rebuild()
+            rec.message_post(body=_("KPIs recomputed for %s participant(s).") % len(participants))
+        return True
+
+    # Certificates: issue for every eligible participant in bulk
+    def _issue_certificates(self):
+        """Create and issue certificates for all eligible participants of these batches.
+
+        Eligibility (participant state, existing certificate, batch thresholds) is
+        read with one query, serials are reserved as one block, and new
+        certificates are created with a single multi-create. Returns one report
+        line per participant: {batch_id, participant_id, name, status, reason,
+        certificate_id}, with status "issued" or "skipped".
+        """
+        if not self:
+            return []
+        Participant = self.env["ojt.participant"]
+        Cert = self.env["ojt.certificate"].sudo()
+        Participant.flush_model(["batch_id", "state", "name", "attendance_rate", "final_score"])
+        Cert.flush_model(["batch_id", "participant_id", "state", "serial_number", "attendance_rate", "final_score"])
+        self.flush_recordset(["attendance_threshold", "score_threshold"])
+        self.env.cr.execute(
+            """
+            SELECT p.id AS participant_id, p.batch_id, p.name, p.state,
+                   p.attendance_rate, p.final_score,
+                   b.attendance_threshold, b.score_threshold,
+                   c.id AS certificate_id, c.state AS certificate_state,
+                   c.attendance_rate AS cert_attendance_rate, c.final_score AS cert_final_score
+              FROM ojt_participant p
+              JOIN ojt_batch b ON b.id = p.batch_id
+         LEFT JOIN ojt_certificate c ON c.participant_id = p.id AND c.batch_id = p.batch_id
+             WHERE p.batch_id = ANY(%s)
+          ORDER BY p.batch_id, p.id
+            """,
+            [self.ids],
+        )
+        rows = self.env.cr.dictfetchall()
+
+        report, eligible = [], []
+        for row in rows:
+            line = {
+                "batch_id": row["batch_id"],
+                "participant_id": row["participant_id"],
+                "name": row["name"],
+                "status": "skipped",
+                "reason": False,
+                "certificate_id": row["certificate_id"] or False,
+            }
+            report.append(line)
+            reason = self._certificate_skip_reason(row)
+            if reason:
+                line["reason"] = reason
+                continue
+            eligible.append((line, row))
+        if not eligible:
+            return report
+
+        today = fields.Date.context_today(self)
+        names = {b.id: _("Certificate of Completion - %s") % b.name for b in self}
+        drafts = Cert.browse([row["certificate_id"] for _line, row in eligible if row["certificate_id"]])
+        serials = iter(self.env["ir.sequence"]._next_block_by_code(
+            "ojt.certificate.seq",
+            len(eligible) - len(drafts) + len(drafts.filtered(lambda c: not c.serial_number)),
+        ))
+
+        create_vals, create_lines = [], []
+        for line, row in eligible:
+            attendance = row["cert_attendance_rate"] or row["attendance_rate"] or 0.0
+            score = row["cert_final_score"] or row["final_score"] or 0.0
+            vals = {
+                "attendance_rate": attendance,
+                "final_score": score,
+                "grade": Cert._grade_for(score),
+                "issued_on": today,
+                "state": "issued",
+            }
+            line["status"] = "issued"
+            if row["certificate_id"]:
+                draft = drafts.browse(row["certificate_id"])
+                vals.update({
+                    "serial_number": draft.serial_number or next(serials),
+                    "qr_token": draft.qr_token or uuid4().hex,
+                    "issued_on": draft.issued_on or today,
+                    "grade": draft.grade or vals["grade"],
+                })
+                draft.write(vals)
+                continue
+            vals.update({
+                "name": names[row["batch_id"]],
+                "batch_id": row["batch_id"],
+                "participant_id": row["participant_id"],
+                "serial_number": next(serials),
+                "qr_token": uuid4().hex,
+            })
+            create_vals.append(vals)
+            create_lines.append(line)
+
+        for line, cert in zip(create_lines, Cert.create(create_vals)):
+            line["certificate_id"] = cert.id
+        return report
+
+    # Certificates: reason a participant row is not eligible (False when eligible)
+    @api.model
+    def _certificate_skip_reason(self, row):
+        if row["certificate_state"] == "issued":
+            return _("Certificate already issued")
+        if row["certificate_state"] == "revoked":
+            return _("Certificate was revoked")
+        if row["state"] in ("left", "failed"):
+            return _("Participant is marked as %s") % row["state"]
+        attendance = row["cert_attendance_rate"] or row["attendance_rate"] or 0.0
+        score = row["cert_final_score"] or row["final_score"] or 0.0
+        fails = []
+        att_req = row["attendance_threshold"] or 0.0
+        sc_req = row["score_threshold"] or 0.0
+        if att_req and attendance < att_req:
+            fails.append(_("Attendance %(val).2f%% < required %(req).2f%%") % {"val": attendance, "req": att_req})
+        if sc_req and score < sc_req:
+            fails.append(_("Final Score %(val).2f < required %(req).2f") % {"val": score, "req": sc_req})
+        return "; ".join(fails) or False
+
+    # Action: issue all eligible certificates and log who was skipped
+    def action_issue_certificates(self):
+        report = self.sudo()._issue_certificates()
+        for rec in self:
+            lines = [line for line in report if line["batch_id"] == rec.id]
+            issued = sum(1 for line in lines if line["status"] == "issued")
+            skipped = [line for line in lines if line["status"] == "skipped"]
+            body = escape(_("Certificates issued: %(issued)s, skipped: %(skipped)s.") % {
+                "issued": issued, "skipped": len(skipped),
+            })
+            if skipped:
+                body += Markup("<ul>%s</ul>") % Markup("").join(
+                    Markup("<li>%s: %s</li>") % (line["name"], line["reason"]) for line in skipped
+                )
+            rec.message_post(body=body)
+        return True
+
     # Navigation: open participants
     def action_open_participants(self):
         return self._action_open_records("ojt.participant", "Participants", [("batch_id", "=", self.id)])
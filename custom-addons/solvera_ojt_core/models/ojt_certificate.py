@@ -1,8 +1,28 @@
 # -*- coding: utf-8 -*-
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
+from typing import NamedTuple
+import hashlib
 import uuid
 
+
+# Verification: compact, immutable public view of one certificate
+class CertificateVerification(NamedTuple):
+    serial: str
+    holder: str
+    batch: str
+    grade: str
+    state: str
+    issued_on: str
+    etag: str
+
+    def as_dict(self):
+        data = self._asdict()
+        data.pop("etag")
+        data["valid"] = self.state == "issued"
+        return data
+
+
 class OjtCertificate(models.Model):
     _name = "ojt.certificate"
     _description = "OJT Certificate"
@@ -52,12 +72,60 @@ class OjtCertificate(models.Model):
             if rec.participant_id and rec.batch_id and rec.participant_id.batch_id != rec.batch_id:
                 raise ValidationError(_("Participant must belong to the selected Batch."))
 
+    # -------- verification --------
+    @api.model
+    def _get_verification(self, token):
+        """Public projection for a QR token (None when unknown).
+
+        The projection is cached per certificate and the write_dates of every
+        row it reads (certificate, participant, partner, batch): a revoke or a
+        rename moves to a new key, so nothing has to be invalidated.
+        """
+        self.flush_model(["qr_token", "state", "participant_id", "batch_id"])
+        self.env["ojt.participant"].flush_model(["name", "partner_id"])
+        self.env["res.partner"].flush_model(["name"])
+        self.env["ojt.batch"].flush_model(["name"])
+        self.env.cr.execute(
+            """
+            SELECT c.id, c.write_date, p.write_date, rp.write_date, b.write_date
+              FROM ojt_certificate c
+              JOIN ojt_participant p ON p.id = c.participant_id
+         LEFT JOIN res_partner rp ON rp.id = p.partner_id
+              JOIN ojt_batch b ON b.id = c.batch_id
+             WHERE c.qr_token = %s AND c.state != 'draft'
+            """,
+            [token],
+        )
+        row = self.env.cr.fetchone()
+        return self._get_verification_cached(row[0], row[1:]) if row else None
+
+    @api.model
+    @tools.ormcache("cert_id", "revision")
+    def _get_verification_cached(self, cert_id, revision):
+        cert = self.sudo().browse(cert_id)
+        values = (
+            cert.serial_number or "",
+            cert.partner_id.name or cert.participant_id.name or "",
+            cert.batch_id.name or "",
+            cert.grade or "",
+            cert.state,
+            fields.Date.to_string(cert.issued_on) or "",
+        )
+        etag = hashlib.sha1(repr(values).encode()).hexdigest()
+        return CertificateVerification(*values, etag=etag)
+
     # -------- helpers --------
+    @api.model
+    def _grade_for(self, final_score):
+        fs = final_score or 0.0
+        return "A" if fs >= 85.0 else ("B" if fs >= 70.0 else "C")
+
     def _ensure_serial_and_token(self):
-        seq = self.env["ir.sequence"]
+        missing = self.filtered(lambda r: not r.serial_number)
+        serials = self.env["ir.sequence"]._next_block_by_code("ojt.certificate.seq", len(missing))
+        for rec, serial in zip(missing, serials):
+            rec.serial_number = serial
         for rec in self:
-            if not rec.serial_number:
-                rec.serial_number = seq.next_by_code("ojt.certificate.seq") or False
             if not rec.qr_token:
                 rec.qr_token = uuid.uuid4().hex
 
@@ -74,8 +142,7 @@ class OjtCertificate(models.Model):
             if not rec.final_score:
                 rec.final_score = p.final_score or 0.0
             if not rec.grade:
-                fs = rec.final_score or 0.0
-                rec.grade = "A" if fs >= 85.0 else ("B" if fs >= 70.0 else "C")
+                rec.grade = self._grade_for(rec.final_score)
 
     def _validate_batch_rules(self):
         """Raise ValidationError if participant/certificate doesn't meet batch thresholds."""
@@ -113,7 +180,8 @@ class OjtCertificate(models.Model):
         for rec in self:
             rec._fill_scores_from_participant()
             rec._validate_batch_rules()          # <-- gate by batch rules
-            rec._ensure_serial_and_token()
+        self._ensure_serial_and_token()          # one serial block for the whole selection
+        for rec in self:
             if not rec.issued_on:
                 rec.issued_on = fields.Date.context_today(self)
             rec.state = "issued"
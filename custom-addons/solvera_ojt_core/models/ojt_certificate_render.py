@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import logging
+import threading
+import time
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+REPORT_XMLID = "solvera_ojt_core.action_report_ojt_certificate"
+TEMPLATE_XMLID = "solvera_ojt_core.report_ojt_certificate_document"
+
+# Fields printed on the certificate: a change re-queues the PDF
+RENDER_FIELDS = {
+    "name", "serial_number", "qr_token", "participant_id", "batch_id",
+    "issued_on", "attendance_rate", "final_score", "grade", "state",
+}
+
+
+class OjtCertificate(models.Model):
+    _inherit = "ojt.certificate"
+
+    # Render cache: queue flag + hash of the data the stored PDF was rendered from
+    pdf_render_pending = fields.Boolean(string="PDF Render Pending", copy=False, readonly=True, index=True)
+    pdf_checksum = fields.Char(string="PDF Data Hash", copy=False, readonly=True)
+
+    # Override: queue new issued certificates
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._queue_pdf_render()
+        return records
+
+    # Override: re-queue when printed data changes
+    def write(self, vals):
+        res = super().write(vals)
+        if RENDER_FIELDS & set(vals):
+            self._queue_pdf_render()
+        return res
+
+    # Hash: everything the template prints, plus the template version
+    def _pdf_data_hash(self, template_version=""):
+        self.ensure_one()
+        payload = (
+            template_version,
+            self.name, self.serial_number, self.qr_token, self.state,
+            self.participant_id.name, self.partner_id.name,
+            self.batch_id.name, str(self.batch_id.start_date), str(self.batch_id.end_date),
+            str(self.issued_on), "%.2f" % self.attendance_rate, "%.2f" % self.final_score, self.grade,
+        )
+        return hashlib.sha1(repr(payload).encode()).hexdigest()
+
+    # Helper: template write_date, so template edits invalidate every cached PDF
+    @api.model
+    def _pdf_template_version(self):
+        template = self.env.ref(TEMPLATE_XMLID, raise_if_not_found=False)
+        return str(template.write_date) if template else ""
+
+    # Helper: certificates whose stored PDF is missing or rendered from older data
+    def _pdf_stale(self):
+        version = self._pdf_template_version()
+        sized = self.with_context(bin_size=True)
+        return self.browse([
+            rec.id for rec in sized
+            if not rec.pdf_report or rec.pdf_checksum != rec._pdf_data_hash(version)
+        ])
+
+    # Queue: flag issued certificates and wake the render cron
+    def _queue_pdf_render(self):
+        issued = self.filtered(lambda c: c.state == "issued")
+        if not issued:
+            return
+        self.env.cr.execute(
+            "UPDATE ojt_certificate SET pdf_render_pending = TRUE WHERE id = ANY(%s) AND pdf_render_pending IS NOT TRUE RETURNING id",
+            [issued.ids],
+        )
+        if self.env.cr.fetchall():  # only wake the cron for newly queued rows
+            issued.invalidate_recordset(["pdf_render_pending"])
+            self.env.ref("solvera_ojt_core.ir_cron_ojt_certificate_render")._trigger()
+
+    # Render: one wkhtmltopdf run for the whole recordset, split back per certificate
+    def _render_pdfs(self):
+        """Render stale certificates of ``self`` and store each PDF as its attachment."""
+        todo = self._pdf_stale()
+        if todo:
+            report = self.env.ref(REPORT_XMLID).sudo()
+            streams = report.with_context(report_pdf_no_attachment=True)._render_qweb_pdf_prepare_streams(
+                REPORT_XMLID, {}, res_ids=todo.ids
+            )
+            if False in streams or any(not streams.get(rid, {}).get("stream") for rid in todo.ids):
+                # Output could not be split per record: fall back to one run each
+                streams = {
+                    rid: {"stream": report._render_qweb_pdf_prepare_streams(REPORT_XMLID, {}, res_ids=[rid])[rid]["stream"]}
+                    for rid in todo.ids
+                }
+            version = self._pdf_template_version()
+            for rec in todo:
+                rec.sudo().write({
+                    "pdf_report": base64.b64encode(streams[rec.id]["stream"].getvalue()),
+                    "pdf_checksum": rec._pdf_data_hash(version),
+                })
+        self.env.cr.execute(
+            "UPDATE ojt_certificate SET pdf_render_pending = FALSE WHERE id = ANY(%s)",
+            [self.ids],
+        )
+        self.invalidate_recordset(["pdf_render_pending"])
+        return todo
+
+    # Cron: drain the render queue in groups sharing one wkhtmltopdf process
+    @api.model
+    def _cron_render_pdfs(self):
+        ICP = self.env["ir.config_parameter"].sudo()
+        chunk_size = max(1, int(ICP.get_param("ojt_certificate_render_chunk", 20) or 20))
+        deadline = time.monotonic() + self.env["ojt.attendance"]._cron_time_budget()
+        auto_commit = not getattr(threading.current_thread(), "testing", False)
+        Cert = self.sudo()
+        done = 0
+        while True:
+            certs = Cert.search([("pdf_render_pending", "=", True)], order="id", limit=chunk_size)
+            if not certs:
+                break
+            try:
+                with self.env.cr.savepoint():
+                    certs._render_pdfs()
+            except Exception:
+                _logger.exception("OJT certificate PDF rendering failed for %s", certs.ids)
+                # drop the chunk from the queue; "Render PDF" re-queues it
+                self.env.cr.execute(
+                    "UPDATE ojt_certificate SET pdf_render_pending = FALSE WHERE id = ANY(%s)",
+                    [certs.ids],
+                )
+                certs.invalidate_recordset()
+            done += len(certs)
+            if auto_commit:
+                self.env.cr.commit()
+            if time.monotonic() >= deadline:
+                break
+        remaining = Cert.search_count([("pdf_render_pending", "=", True)]) if certs else 0
+        self.env["ir.cron"]._notify_progress(done=done, remaining=remaining)
+
+    # Action: (re)queue PDF rendering for the selected certificates
+    def action_queue_pdf_render(self):
+        self._queue_pdf_render()
+        return True
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo import api, fields, models
+from odoo.tools import sql
+
+from .ojt_fields import BigInteger
+
+# Models replicated downstream through the change feed
+CHANGE_LOG_MODELS = ("ojt.attendance", "ojt.submission", "ojt.participant", "ojt.certificate")
+
+# Participant fields the SQL KPI engine updates behind the ORM
+KPI_LOG_FIELDS = ("attendance_rate", "average_score", "final_score")
+
+# Rows deleted by SQL ondelete="cascade" when a parent is unlinked: (model, condition on %(ids)s)
+CASCADE_LOG = {
+    "ojt.batch": [
+        ("ojt.participant", "batch_id = ANY(%(ids)s)"),
+        ("ojt.attendance", "batch_id = ANY(%(ids)s)"),
+        ("ojt.certificate", "batch_id = ANY(%(ids)s)"),
+        ("ojt.submission", "participant_id IN (SELECT id FROM ojt_participant WHERE batch_id = ANY(%(ids)s))"
+                           " OR assignment_id IN (SELECT id FROM ojt_assignment WHERE batch_id = ANY(%(ids)s))"),
+    ],
+    "ojt.participant": [
+        ("ojt.attendance", "participant_id = ANY(%(ids)s)"),
+        ("ojt.submission", "participant_id = ANY(%(ids)s)"),
+        ("ojt.certificate", "participant_id = ANY(%(ids)s)"),
+    ],
+    "ojt.assignment": [
+        ("ojt.submission", "assignment_id = ANY(%(ids)s)"),
+    ],
+}
+
+
+class OjtChangeLog(models.Model):
+    _name = "ojt.change.log"
+    _description = "OJT Change Log"
+    _order = "id"
+    _log_access = False
+
+    # Entry: one row per record and operation; id is the sequence number
+    model = fields.Char(string="Model", required=True)
+    res_id = fields.Integer(string="Record ID", required=True)
+    operation = fields.Selection(
+        [("create", "Create"), ("write", "Write"), ("unlink", "Unlink")],
+        string="Operation",
+        required=True,
+    )
+    changed_fields = fields.Char(string="Changed Fields")
+    logged_at = fields.Datetime(string="Logged At", required=True)
+    # Writer transaction id (set to txid_current() on insert): the feed only returns entries of
+    # transactions every reader can already see, so late commits never slip behind a client's cursor.
+    txid = BigInteger(string="Transaction ID", readonly=True)
+
+    def init(self):
+        sql.create_index(self.env.cr, "ojt_change_log_txid_id_idx", self._table, ["txid", "id"])
+
+    # Log: one multi-row INSERT for many records of one model
+    @api.model
+    def _log(self, model, res_ids, operation, changed_fields=None):
+        res_ids = [rid for rid in res_ids if rid]
+        if not res_ids:
+            return
+        now = fields.Datetime.now()
+        changed = ",".join(sorted(changed_fields)) if changed_fields else None
+        values = [(model, rid, operation, changed, now) for rid in res_ids]
+        self.env.cr.execute(
+            "INSERT INTO ojt_change_log (model, res_id, operation, changed_fields, logged_at, txid) VALUES "
+            + ", ".join(["(%s, %s, %s, %s, %s, txid_current())"] * len(values)),
+            [v for row in values for v in row],
+        )
+
+    # Log: unlink entries for the rows a parent's unlink will delete through SQL cascades
+    @api.model
+    def _log_cascade(self, parent_model, parent_ids):
+        if not parent_ids or parent_model not in CASCADE_LOG:
+            return
+        now = fields.Datetime.now()
+        for model, condition in CASCADE_LOG[parent_model]:
+            self.env[model].flush_model()
+            self.env.cr.execute(
+                f"""
+                INSERT INTO ojt_change_log (model, res_id, operation, logged_at, txid)
+                SELECT %(model)s, id, 'unlink', %(now)s, txid_current()
+                  FROM {self.env[model]._table}
+                 WHERE {condition}
+                """,
+                {"model": model, "now": now, "ids": list(parent_ids)},
+            )
+
+    # Cursor: "<txid>-<id>", empty for the beginning of the log
+    @api.model
+    def _parse_cursor(self, cursor):
+        if not cursor:
+            return (0, 0)
+        txid, _sep, log_id = cursor.partition("-")
+        return (int(txid), int(log_id))
+
+    # Feed: entries after ``cursor`` as NDJSON lines, plus the cursor to resume from
+    @api.model
+    def _export_ndjson(self, cursor=None, limit=5000, models=None):
+        """Return (lines, next_cursor); cost is proportional to the entries returned."""
+        after = self._parse_cursor(cursor)
+        where = ["(txid, id) > (%(txid)s, %(id)s)", "txid < txid_snapshot_xmin(txid_current_snapshot())"]
+        params = {"txid": after[0], "id": after[1], "limit": limit}
+        if models:
+            where.append("model = ANY(%(models)s)")
+            params["models"] = list(models)
+        self.env.cr.execute(
+            f"""
+            SELECT txid, id, model, res_id, operation, changed_fields, logged_at
+              FROM ojt_change_log
+             WHERE {" AND ".join(where)}
+          ORDER BY txid, id
+             LIMIT %(limit)s
+            """,
+            params,
+        )
+        lines, next_cursor = [], cursor or ""
+        for txid, log_id, model, res_id, operation, changed, logged_at in self.env.cr.fetchall():
+            next_cursor = "%s-%s" % (txid, log_id)
+            lines.append(json.dumps({
+                "seq": log_id,
+                "cursor": next_cursor,
+                "model": model,
+                "id": res_id,
+                "op": operation,
+                "fields": changed.split(",") if changed else None,
+                "at": fields.Datetime.to_string(logged_at),
+            }))
+        return lines, next_cursor
+
+    # Cron: drop entries older than the retention window
+    @api.model
+    def _cron_purge(self):
+        days = int(self.env["ir.config_parameter"].sudo().get_param("ojt_change_log_retention_days", 30) or 30)
+        self.env.cr.execute(
+            "DELETE FROM ojt_change_log WHERE logged_at < %s",
+            [fields.Datetime.subtract(fields.Datetime.now(), days=days)],
+        )
+
+
+class OjtChangeLogMixin(models.AbstractModel):
+    _name = "ojt.change.log.mixin"
+    _description = "OJT Change Log Hooks"
+
+    # Hooks: record create/write/unlink in the change log
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env["ojt.change.log"]._log(self._name, records.ids, "create")
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env["ojt.change.log"]._log(self._name, self.ids, "write", vals.keys())
+        return res
+
+    def unlink(self):
+        ids = self.ids
+        res = super().unlink()
+        self.env["ojt.change.log"]._log(self._name, ids, "unlink")
+        return res
+
+
+class OjtAttendance(models.Model):
+    _name = "ojt.attendance"
+    _inherit = ["ojt.attendance", "ojt.change.log.mixin"]
+
+
+class OjtSubmission(models.Model):
+    _name = "ojt.submission"
+    _inherit = ["ojt.submission", "ojt.change.log.mixin"]
+
+
+class OjtCertificate(models.Model):
+    _name = "ojt.certificate"
+    _inherit = ["ojt.certificate", "ojt.change.log.mixin"]
+
+
+class OjtParticipant(models.Model):
+    _name = "ojt.participant"
+    _inherit = ["ojt.participant", "ojt.change.log.mixin"]
+
+    # Hook: attendance, submissions and certificates cascade in SQL
+    def unlink(self):
+        self.env["ojt.change.log"]._log_cascade(self._name, self.ids)
+        return super().unlink()
+
+    # Hooks: KPI columns updated by the SQL engine
+    def _kpi_mark_changed(self):
+        super()._kpi_mark_changed()
+        self.env["ojt.change.log"]._log(self._name, self.ids, "write", KPI_LOG_FIELDS)
+
+    def _kpi_rebuild(self):
+        res = super()._kpi_rebuild()
+        self.env["ojt.change.log"]._log(self._name, self.ids, "write", KPI_LOG_FIELDS)
+        return res
+
+
+class OjtAssignment(models.Model):
+    _inherit = "ojt.assignment"
+
+    # Hook: submissions cascade in SQL
+    def unlink(self):
+        self.env["ojt.change.log"]._log_cascade(self._name, self.ids)
+        return super().unlink()
+
+
+class OjtBatch(models.Model):
+    _inherit = "ojt.batch"
+
+    # Hook: participants, attendance, certificates and submissions cascade in SQL
+    def unlink(self):
+        self.env["ojt.change.log"]._log_cascade(self._name, self.ids)
+        return super().unlink()
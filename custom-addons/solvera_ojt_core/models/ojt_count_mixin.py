@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models
+
+
+class OjtCountMixin(models.AbstractModel):
+    _name = "ojt.count.mixin"
+    _description = "OJT Grouped Counters"
+
+    # Helper: {id: count} of ``model`` rows per ``field`` value, one _read_group per call
+    @api.model
+    def _grouped_counts(self, model, field, ids, domain=None):
+        ids = [i for i in ids if isinstance(i, int)]
+        if not ids:
+            return {}
+        groups = self.env[model]._read_group(
+            [(field, "in", ids)] + (domain or []),
+            groupby=[field],
+            aggregates=["__count"],
+        )
+        return {record.id: count for record, count in groups}
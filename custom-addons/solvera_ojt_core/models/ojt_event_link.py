@@ -1,12 +1,16 @@
 # -*- coding: utf-8 -*-
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
+from odoo.tools import consteq
+from odoo.tools.misc import hmac
+from uuid import uuid4
+import time
 
 
 class OjtEventLink(models.Model):
     _name = "ojt.event.link"
     _description = "OJT Event Link"
-    _inherit = ["mail.thread", "mail.activity.mixin"]
+    _inherit = ["mail.thread", "mail.activity.mixin", "ojt.count.mixin"]
     _order = "date_start, id"
     _rec_name = "title"
 
@@ -26,23 +30,52 @@ class OjtEventLink(models.Model):
     weight = fields.Float(string="Weight")
     notes = fields.Text(string="Notes")
 
+    # Sync: deferred attendance backfill flag (deduplicated by the sync cron)
+    attendance_sync_pending = fields.Boolean(string="Attendance Sync Pending", copy=False, readonly=True, index=True)
+
+    # Check-in: one QR per participant, or one shared session QR (portal login resolves the row)
+    checkin_mode = fields.Selection(
+        [
+            ("participant", "Per Participant QR"),
+            ("session", "Shared Session QR"),
+            ("rotating", "Rotating Session QR"),
+        ],
+        string="Check-in Mode",
+        default="participant",
+        required=True,
+        help="Rotating: one signed code shown on a projector, renewed every few seconds; no per-participant tokens.",
+    )
+    checkin_rotation_seconds = fields.Integer(string="QR Rotation (seconds)", default=30)
+    session_token = fields.Char(string="Session Token", copy=False, readonly=True)
+    session_checkin_url = fields.Char(string="Session Check-in Link", compute="_compute_session_checkin_url")
+
+    _sql_constraints = [
+        ("uniq_session_token", "unique(session_token)", "Session token must be unique."),
+    ]
+
     # Counters: participants, attendance, and assignments
     participants_count = fields.Integer(string="Participants", compute="_compute_counts")
     attendance_count = fields.Integer(string="Attendance", compute="_compute_counts")
     assignments_count = fields.Integer(string="Assignments", compute="_compute_counts")
 
-    # Compute: simple counters for related records
+    # Compute: counters for related records (one grouped query per target model)
     @api.depends("batch_id")
     def _compute_counts(self):
-        Participant = self.env["ojt.participant"]
-        Attendance = self.env["ojt.attendance"]
-        Assignment = self.env["ojt.assignment"]
+        ids = self._origin.ids
+        participants = self._grouped_counts("ojt.participant", "batch_id", self.batch_id.ids)
+        attendance = self._grouped_counts("ojt.attendance", "event_link_id", ids)
+        assignments = self._grouped_counts("ojt.assignment", "event_link_id", ids)
         for rec in self:
-            rec.participants_count = (
-                Participant.search_count([("batch_id", "=", rec.batch_id.id)]) if rec.batch_id else 0
-            )
-            rec.attendance_count = Attendance.search_count([("event_link_id", "=", rec.id)]) if rec.id else 0
-            rec.assignments_count = Assignment.search_count([("event_link_id", "=", rec.id)]) if rec.id else 0
+            rec.participants_count = participants.get(rec.batch_id.id, 0)
+            rec.attendance_count = attendance.get(rec._origin.id, 0)
+            rec.assignments_count = assignments.get(rec._origin.id, 0)
+
+    # Compute: shared check-in link (empty until a token is issued)
+    @api.depends("session_token")
+    def _compute_session_checkin_url(self):
+        base = self.env["ir.config_parameter"].sudo().get_param("web.base.url", "").rstrip("/")
+        for rec in self:
+            rec.session_checkin_url = f"{base}/ojt/s/{rec.session_token}" if rec.session_token else False
 
     # Constraint: end must not be earlier than start
     @api.constrains("date_start", "date_end")
@@ -79,57 +112,191 @@ class OjtEventLink(models.Model):
     def action_open_assignments(self):
         return self._action_open_records("ojt.assignment", "Assignments", [("event_link_id", "=", self.id)])
 
+    # Sync: create missing attendance rows for all links at once (set-based)
     def ensure_attendance_for_batch_participants(self):
-        Participant = self.env["ojt.participant"].sudo()
+        links = self.filtered("batch_id")
+        if not links:
+            return
+        links.batch_id.sudo()._materialize_attendance_grid(event_link_ids=links.ids)
+
         Attendance = self.env["ojt.attendance"].sudo()
-        for rec in self:
-            if not rec.batch_id:
-                continue
-            participants = Participant.search([("batch_id", "=", rec.batch_id.id)])
-            if not participants:
-                continue
-
-            existing = Attendance.read_group(
-                domain=[("event_link_id", "=", rec.id)],
-                fields=["participant_id"],
-                groupby=["participant_id"],
+        Attendance.search([("event_link_id", "in", links.ids), ("qr_token", "=", False)])._ensure_token()
+
+    # Sync: run now, or defer to the sync cron during imports / when asked via context
+    def _schedule_attendance_sync(self):
+        if not self:
+            return
+        if self.env.context.get("ojt_defer_attendance_sync") or self.env.context.get("import_file"):
+            self.env.cr.execute(
+                "UPDATE ojt_event_link SET attendance_sync_pending = TRUE WHERE id = ANY(%s)",
+                [self.ids],
             )
-            existing_ids = {e["participant_id"][0] for e in existing if e.get("participant_id")}
-            to_create = []
-            for p in participants:
-                if p.id in existing_ids:
-                    continue
-                to_create.append({
-                    "batch_id": rec.batch_id.id,
-                    "event_link_id": rec.id,
-                    "participant_id": p.id,
-                    "presence": "absent",
-                    "method": "manual",
-                })
-            if to_create:
-                Attendance.create(to_create)
-
-            missing = Attendance.search([
-                ("event_link_id", "=", rec.id),
-                ("qr_token", "=", False),
-            ], limit=0)
-            for att in missing:
-                att.write({"qr_token": uuid4().hex})
-
-    # Override: create and then backfill attendance
+            self.invalidate_recordset(["attendance_sync_pending"])
+            self.env.ref("solvera_ojt_core.ir_cron_ojt_event_link_attendance_sync")._trigger()
+        else:
+            self.ensure_attendance_for_batch_participants()
+
+    # Cron: one set-based backfill for every link flagged since the last run
     @api.model
-    def create(self, vals):
-        rec = super().create(vals)
-        rec.ensure_attendance_for_batch_participants()
-        return rec
+    def _cron_sync_pending_attendance(self):
+        links = self.sudo().search([("attendance_sync_pending", "=", True)])
+        if not links:
+            return
+        links.ensure_attendance_for_batch_participants()
+        self.env.cr.execute(
+            "UPDATE ojt_event_link SET attendance_sync_pending = FALSE WHERE id = ANY(%s)",
+            [links.ids],
+        )
+        links.invalidate_recordset(["attendance_sync_pending"])
+
+    # Override: create and then backfill attendance for all new links in one pass
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._schedule_attendance_sync()
+        return records
 
-    # Override: always re-sync attendance (idempotent)
+    # Override: re-sync attendance only when the link actually moved to another batch
     def write(self, vals):
+        moved = self.browse()
+        if "batch_id" in vals:
+            moved = self.filtered(lambda r: r.batch_id.id != vals["batch_id"])
+        rotated = unrotated = self.browse()
+        if vals.get("checkin_mode", "rotating") != "rotating":
+            unrotated = self.filtered(lambda r: r.checkin_mode == "rotating")
+        elif "checkin_mode" in vals:
+            rotated = self.filtered(lambda r: r.checkin_mode != "rotating")
         res = super().write(vals)
-        if "batch_id" in vals or True:
-            self.ensure_attendance_for_batch_participants()
+        moved._schedule_attendance_sync()
+        rotated._revoke_qr_tokens()
+        unrotated._backfill_qr_tokens()
         return res
 
+    # Tokens: a link going rotating drops every personal token so screenshots stop working
+    def _revoke_qr_tokens(self):
+        if not self:
+            return
+        self.env["ojt.attendance"].flush_model(["qr_token", "event_link_id"])
+        self.env.cr.execute(
+            """
+            UPDATE ojt_attendance
+               SET qr_token = NULL
+             WHERE event_link_id = ANY(%s) AND qr_token IS NOT NULL
+         RETURNING id, participant_id
+            """,
+            [self.ids],
+        )
+        self._qr_tokens_changed(self.env.cr.fetchall())
+
+    # Tokens: rows inserted while the link was rotating have none; issue them in one UPDATE
+    def _backfill_qr_tokens(self):
+        if not self:
+            return
+        self.env["ojt.attendance"].flush_model(["qr_token", "event_link_id"])
+        self.env.cr.execute(
+            """
+            UPDATE ojt_attendance
+               SET qr_token = replace(gen_random_uuid()::text, '-', '')
+             WHERE event_link_id = ANY(%s) AND qr_token IS NULL
+         RETURNING id, participant_id
+            """,
+            [self.ids],
+        )
+        self._qr_tokens_changed(self.env.cr.fetchall())
+
+    # Tokens: sync caches, portal pages and the change feed after a bulk token UPDATE
+    def _qr_tokens_changed(self, rows):
+        if not rows:
+            return
+        self.env["ojt.attendance"].invalidate_model(["qr_token"])
+        self.env["ojt.participant"]._portal_touch([r[1] for r in rows])
+        self.env["ojt.change.log"]._log("ojt.attendance", [r[0] for r in rows], "write", ("qr_token",))
+
+    # QR: (file name, encoded value) for every attendance row of this session
+    def _qr_entries(self, mode="checkin"):
+        self.ensure_one()
+        attendance = self.env["ojt.attendance"].sudo().search(
+            [("event_link_id", "=", self.id), ("qr_token", "!=", False)], order="participant_id, id"
+        )
+        return [
+            (att.participant_id.name or att.participant_id.partner_id.name or str(att.participant_id.id), att._qr_value(mode))
+            for att in attendance
+        ]
+
+    # QR: issue the shared session token on first use
+    def _ensure_session_token(self):
+        for rec in self.filtered(lambda r: not r.session_token):
+            rec.session_token = uuid4().hex
+
+    # Lookup: attendance row of a partner for this session
+    def _attendance_for_partner(self, partner_id):
+        """Two unique-index probes: participant (batch_id, partner_id), then attendance (participant_id, event_link_id)."""
+        self.ensure_one()
+        self.env["ojt.attendance"].flush_model(["event_link_id", "participant_id"])
+        self.env["ojt.participant"].flush_model(["batch_id", "partner_id"])
+        self.env.cr.execute(
+            """
+            SELECT a.id
+              FROM ojt_participant p
+              JOIN ojt_attendance a ON a.participant_id = p.id AND a.event_link_id = %s
+             WHERE p.batch_id = %s AND p.partner_id = %s
+             LIMIT 1
+            """,
+            [self.id, self.batch_id.id, partner_id],
+        )
+        row = self.env.cr.fetchone()
+        return self.env["ojt.attendance"].browse(row[0] if row else [])
+
+    # Rotating QR: current time window (codes of the previous window are still accepted)
+    def _session_window(self, at=None):
+        self.ensure_one()
+        return int((at or time.time()) // max(5, self.checkin_rotation_seconds or 30))
+
+    # Rotating QR: HMAC of link, window and session secret (regenerating the token revokes all codes)
+    def _session_signature(self, window):
+        self.ensure_one()
+        message = "%s:%s:%s" % (self.id, window, self.session_token or "")
+        return hmac(self.env(su=True), "ojt-session-checkin", message)[:20]
+
+    def _rotating_checkin_url(self, window=None):
+        self.ensure_one()
+        window = self._session_window() if window is None else window
+        base = self.get_base_url().rstrip("/")
+        return f"{base}/ojt/r/{self.id}/{window}/{self._session_signature(window)}"
+
+    def _verify_rotating_code(self, window, signature):
+        self.ensure_one()
+        if not self.session_token or self.checkin_mode != "rotating":
+            return False
+        current = self._session_window()
+        if window not in (current, current - 1):
+            return False
+        return consteq(self._session_signature(window), signature or "")
+
+    # Button: open the projector page showing the rotating code
+    def action_open_session_display(self):
+        self.ensure_one()
+        self._ensure_session_token()
+        return {
+            "type": "ir.actions.act_url",
+            "url": "/ojt/session/%s/display" % self.id,
+            "target": "new",
+        }
+
+    # Button: printable QR sheet (per participant or one shared code, following check-in mode)
+    def action_print_qr_sheet(self):
+        self.filtered(lambda r: r.checkin_mode == "session")._ensure_session_token()
+        return self.env.ref("solvera_ojt_core.action_report_ojt_event_link_qr_sheet").report_action(self)
+
+    # Button: download every check-in QR of this session as one ZIP
+    def action_download_qr_zip(self):
+        self.ensure_one()
+        return {
+            "type": "ir.actions.act_url",
+            "url": "/ojt/event/%s/qr.zip" % self.id,
+            "target": "self",
+        }
+
     # Button: idempotent generator + open attendance
     def action_generate_attendance(self):
         self.ensure_attendance_for_batch_participants()
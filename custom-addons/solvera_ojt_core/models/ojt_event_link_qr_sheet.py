@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import base64
+
+from odoo import api, models
+
+SHEET_COLUMNS = 3
+SHEET_ROWS = 4
+SHEET_QR_SIZE = 256
+
+
+class ReportOjtEventLinkQrSheet(models.AbstractModel):
+    _name = "report.solvera_ojt_core.report_ojt_event_link_qr_sheet"
+    _description = "OJT Event Link QR Sheet"
+
+    # Helper: inline data URI from the disk-cached PNG (no HTTP round trip per code)
+    @api.model
+    def _qr_data_uri(self, value, size=SHEET_QR_SIZE):
+        content, _key = self.env["ojt.qr"].get_image(value, "png", size)
+        return "data:image/png;base64,%s" % base64.b64encode(content).decode()
+
+    # Values: per link either one shared code or pages of participant cards
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        links = self.env["ojt.event.link"].browse(docids)
+        sheets = []
+        for link in links:
+            if link.checkin_mode == "session":
+                link._ensure_session_token()
+                sheets.append({
+                    "link": link,
+                    "shared": self._qr_data_uri(link.session_checkin_url, 512),
+                    "pages": [],
+                })
+                continue
+            cards = [
+                {"name": name, "qr": self._qr_data_uri(value)}
+                for name, value in link._qr_entries("checkin")
+            ]
+            per_page = SHEET_COLUMNS * SHEET_ROWS
+            pages = [
+                [cards[i:i + per_page][r:r + SHEET_COLUMNS] for r in range(0, per_page, SHEET_COLUMNS)]
+                for i in range(0, len(cards), per_page)
+            ]
+            sheets.append({"link": link, "shared": False, "pages": [[row for row in page if row] for page in pages]})
+        return {
+            "doc_ids": docids,
+            "doc_model": "ojt.event.link",
+            "docs": links,
+            "sheets": sheets,
+        }
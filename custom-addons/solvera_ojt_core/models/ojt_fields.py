@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+from odoo import fields
+
+
+class BigInteger(fields.Integer):
+    """Integer stored as int8 (transaction ids outgrow int4)."""
+    column_type = ("int8", "int8")
@@ -7,6 +7,7 @@ from urllib.parse import quote  # URL-safe return path
 class OjtParticipant(models.Model):
     _name = "ojt.participant"
     _description = "OJT Participant"
+    _inherit = ["ojt.count.mixin"]
     _order = "batch_id, partner_id, id desc"
 
     # State: draft -> active -> completed/failed/left
@@ -36,6 +37,14 @@ class OjtParticipant(models.Model):
     final_score = fields.Float(string="Final Score", compute="_compute_metrics", store=True, readonly=True)
     mentor_score = fields.Float(string="Mentor Score", default=0.0)
 
+    # KPI store: incremental aggregates fed by attendance/submission/assignment deltas
+    kpi_present_count = fields.Integer(string="Attended Sessions", default=0, readonly=True, copy=False)
+    kpi_total_count = fields.Integer(string="Total Sessions", default=0, readonly=True, copy=False)
+    kpi_score_count = fields.Integer(string="Scored Assignments", default=0, readonly=True, copy=False)
+    kpi_norm_sum = fields.Float(string="Normalized Score Sum", default=0.0, readonly=True, copy=False)
+    kpi_weighted_sum = fields.Float(string="Weighted Score Sum", default=0.0, readonly=True, copy=False)
+    kpi_weight_sum = fields.Float(string="Weight Sum", default=0.0, readonly=True, copy=False)
+
     # Smart-button counters
     submission_count = fields.Integer(string="Submissions", compute="_compute_counts")
     attendance_count = fields.Integer(string="Attendance", compute="_compute_counts")
@@ -78,53 +87,29 @@ class OjtParticipant(models.Model):
                 if rec.applicant_id.partner_id.id != rec.partner_id.id:
                     raise ValidationError(_("Applicant's partner must match the Participant's partner."))
 
-    # Compute: attendance rate and (weighted) scores
+    # Compute: attendance rate and (weighted) scores from the KPI store (O(1) per record)
     @api.depends(
-        "batch_id",
-        "attendance_ids.presence",
-        "submission_ids.score",
-        "submission_ids.assignment_id.max_score",
-        "submission_ids.assignment_id.weight",
-        "submission_ids.assignment_id.batch_id",
+        "kpi_present_count",
+        "kpi_total_count",
+        "kpi_score_count",
+        "kpi_norm_sum",
+        "kpi_weighted_sum",
+        "kpi_weight_sum",
         "mentor_score",
     )
     def _compute_metrics(self):
         for rec in self:
-            total = len(rec.attendance_ids)
-            present = sum(1 for a in rec.attendance_ids if a.presence in ("present", "late"))
-            rec.attendance_rate = (present / total * 100.0) if total else 0.0
-
-            subs = rec.submission_ids.filtered(
-                lambda s: s.assignment_id and s.assignment_id.batch_id == rec.batch_id
-            )
-            if not subs:
-                task_avg = 0.0
-                task_final = 0.0
-            else:
-                by_assign = {}
-                for s in subs:
-                    asg = s.assignment_id
-                    if not asg or (asg.max_score or 0.0) <= 0:
-                        continue
-                    cur_best = by_assign.get(asg.id)
-                    if cur_best is None or (s.score or 0.0) > (cur_best.score or 0.0):
-                        by_assign[asg.id] = s
-
-                normals = []
-                w_sum = 0.0
-                w_tot = 0.0
-                for s in by_assign.values():
-                    maxs = s.assignment_id.max_score or 0.0
-                    if maxs <= 0:
-                        continue
-                    norm = (s.score or 0.0) / maxs * 100.0
-                    normals.append(norm)
-                    w = s.assignment_id.weight or 0.0
-                    w_sum += norm * w
-                    w_tot += w
-
-                task_avg = sum(normals) / len(normals) if normals else 0.0
-                task_final = (w_sum / w_tot) if w_tot else task_avg
+            total = rec.kpi_total_count
+            present = rec.kpi_present_count
+            rec.attendance_rate = min(100.0, max(0.0, present / total * 100.0)) if total > 0 else 0.0
+
+            count = rec.kpi_score_count
+            task_avg = rec.kpi_norm_sum / count if count > 0 else 0.0
+            w_tot = rec.kpi_weight_sum if count > 0 else 0.0
+            # sums are maintained by deltas; ignore float residue around zero
+            task_final = rec.kpi_weighted_sum / w_tot if w_tot > 1e-9 else task_avg
+            task_avg = min(100.0, max(0.0, task_avg))
+            task_final = min(100.0, max(0.0, task_final))
 
             rec.average_score = task_avg
             TASK_W = 0.80
@@ -139,15 +124,17 @@ class OjtParticipant(models.Model):
     def action_set_left(self): self.write({"state": "left"})
     def action_set_draft(self): self.write({"state": "draft"})
 
-    # Compute: smart-button totals
+    # Compute: smart-button totals (one grouped query per target model)
     def _compute_counts(self):
-        Sub = self.env["ojt.submission"]
-        Att = self.env["ojt.attendance"]
-        Cert = self.env["ojt.certificate"]
+        ids = self._origin.ids
+        submissions = self._grouped_counts("ojt.submission", "participant_id", ids)
+        attendance = self._grouped_counts("ojt.attendance", "participant_id", ids)
+        certificates = self._grouped_counts("ojt.certificate", "participant_id", ids)
         for rec in self:
-            rec.submission_count = Sub.search_count([("participant_id", "=", rec.id)])
-            rec.attendance_count = Att.search_count([("participant_id", "=", rec.id)])
-            rec.certificate_count = Cert.search_count([("participant_id", "=", rec.id)])
+            pid = rec._origin.id
+            rec.submission_count = submissions.get(pid, 0)
+            rec.attendance_count = attendance.get(pid, 0)
+            rec.certificate_count = certificates.get(pid, 0)
 
     # Navigation: open submissions filtered by participant
     def action_open_assignments(self):
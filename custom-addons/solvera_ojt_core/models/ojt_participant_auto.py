@@ -5,12 +5,13 @@ from odoo import api, models
 class OjtParticipant(models.Model):
     _inherit = "ojt.participant"
 
-    # Hook: ensure attendance rows after create
-    @api.model
-    def create(self, vals):
-        rec = super().create(vals)
-        rec._ensure_attendance_for_existing_events()
-        return rec
+    # Hook: backfill attendance and KPIs for all new participants at once
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._ensure_attendance_for_existing_events()
+        records._kpi_rebuild()
+        return records
 
     # Hook: re-sync attendance when batch changes
     def write(self, vals):
@@ -21,34 +22,6 @@ class OjtParticipant(models.Model):
 
     # Helper: create attendance rows for all events in the participant's batch
     def _ensure_attendance_for_existing_events(self):
-        EventLink = self.env["ojt.event.link"].sudo()
-        Attendance = self.env["ojt.attendance"].sudo()
-        for p in self:
-            if not p.batch_id:
-                continue
-            links = EventLink.search([("batch_id", "=", p.batch_id.id)])
-            if not links:
-                continue
-
-            existing = Attendance.search_read(
-                domain=[("participant_id", "=", p.id), ("event_link_id", "in", links.ids)],
-                fields=["event_link_id"],
-                limit=0,
-            )
-            existing_link_ids = {e["event_link_id"][0] for e in existing if e.get("event_link_id")}
-
-            to_create = []
-            for l in links:
-                if l.id in existing_link_ids:
-                    continue
-                to_create.append(
-                    {
-                        "batch_id": p.batch_id.id,
-                        "event_link_id": l.id,
-                        "participant_id": p.id,
-                        "presence": "absent",
-                        "method": "manual",  # will update on check-in
-                    }
-                )
-            if to_create:
-                Attendance.create(to_create)
+        participants = self.filtered("batch_id")
+        if participants:
+            participants.batch_id.sudo()._materialize_attendance_grid(participant_ids=participants.ids)
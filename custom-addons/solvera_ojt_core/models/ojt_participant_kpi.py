@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo import api, fields, models
+
+# Participant columns holding the incremental KPI aggregates
+KPI_STORE_FIELDS = (
+    "kpi_present_count",
+    "kpi_total_count",
+    "kpi_score_count",
+    "kpi_norm_sum",
+    "kpi_weighted_sum",
+    "kpi_weight_sum",
+)
+KPI_INT_FIELDS = ("kpi_present_count", "kpi_total_count", "kpi_score_count")
+
+
+class OjtParticipantScore(models.Model):
+    _name = "ojt.participant.score"
+    _description = "OJT Participant Best Score per Assignment"
+    _log_access = False
+
+    # Best submission score of a participant for one assignment (same batch, max_score > 0)
+    participant_id = fields.Many2one("ojt.participant", string="Participant", required=True, ondelete="cascade", index=True)
+    assignment_id = fields.Many2one("ojt.assignment", string="Assignment", required=True, ondelete="cascade", index=True)
+    best_score = fields.Float(string="Best Score")
+    norm = fields.Float(string="Normalized Score", help="Best score normalized to 0..100.")
+    weight = fields.Float(string="Weight", help="Assignment weight when the row was last updated.")
+
+    _sql_constraints = [
+        ("uniq_participant_assignment", "unique(participant_id, assignment_id)", "One best score per participant and assignment."),
+    ]
+
+
+class OjtParticipant(models.Model):
+    _inherit = "ojt.participant"
+
+    # Engine: add deltas to the KPI store and schedule the O(1) KPI recompute
+    @api.model
+    def _kpi_apply_deltas(self, deltas):
+        """Apply ``{participant_id: {kpi_field: delta}}`` with one UPDATE."""
+        rows = []
+        for pid, delta in deltas.items():
+            if not pid or not any(delta.values()):
+                continue
+            rows.append((pid,) + tuple(
+                int(delta.get(f, 0)) if f in KPI_INT_FIELDS else float(delta.get(f, 0.0))
+                for f in KPI_STORE_FIELDS
+            ))
+        if not rows:
+            return
+        assign = ", ".join(f"{f} = COALESCE(p.{f}, 0) + d.{f}" for f in KPI_STORE_FIELDS)
+        self.env.cr.execute(
+            f"""
+            UPDATE ojt_participant p
+               SET {assign}
+              FROM (VALUES {", ".join(["%s"] * len(rows))}) AS d(id, {", ".join(KPI_STORE_FIELDS)})
+             WHERE p.id = d.id
+            """,
+            rows,
+        )
+        self.browse([r[0] for r in rows])._kpi_mark_changed()
+
+    # Engine: drop cached store values and flag dependent KPIs for recompute
+    def _kpi_mark_changed(self):
+        self.invalidate_recordset(list(KPI_STORE_FIELDS))
+        self.modified(list(KPI_STORE_FIELDS))
+
+    # Engine: refresh best scores for (participant_id, assignment_id) pairs and push deltas
+    @api.model
+    def _kpi_refresh_scores(self, pairs):
+        pairs = tuple({(p, a) for p, a in pairs if p and a})
+        if not pairs:
+            return
+        self.env["ojt.submission"].flush_model(["score", "assignment_id", "participant_id"])
+        self.env["ojt.assignment"].flush_model(["max_score", "weight", "batch_id"])
+        self.flush_model(["batch_id"])
+        cr = self.env.cr
+
+        cr.execute(
+            """
+            SELECT participant_id, assignment_id, norm, weight
+              FROM ojt_participant_score
+             WHERE (participant_id, assignment_id) IN %s
+            """,
+            [pairs],
+        )
+        old = {(r[0], r[1]): (r[2], r[3]) for r in cr.fetchall()}
+
+        cr.execute(
+            """
+            SELECT s.participant_id, s.assignment_id, MAX(COALESCE(s.score, 0)), a.max_score, COALESCE(a.weight, 0)
+              FROM ojt_submission s
+              JOIN ojt_assignment a ON a.id = s.assignment_id
+              JOIN ojt_participant p ON p.id = s.participant_id
+             WHERE (s.participant_id, s.assignment_id) IN %s
+               AND a.batch_id = p.batch_id
+               AND a.max_score > 0
+          GROUP BY s.participant_id, s.assignment_id, a.max_score, a.weight
+            """,
+            [pairs],
+        )
+        new = {}
+        for pid, aid, best, max_score, weight in cr.fetchall():
+            new[(pid, aid)] = (best, best / max_score * 100.0, weight)
+
+        deltas = defaultdict(lambda: defaultdict(float))
+        for pair in pairs:
+            before, after = old.get(pair), new.get(pair)
+            if before == (after and after[1:]):
+                continue
+            d = deltas[pair[0]]
+            if before:
+                d["kpi_score_count"] -= 1
+                d["kpi_norm_sum"] -= before[0]
+                d["kpi_weighted_sum"] -= before[0] * before[1]
+                d["kpi_weight_sum"] -= before[1]
+            if after:
+                d["kpi_score_count"] += 1
+                d["kpi_norm_sum"] += after[1]
+                d["kpi_weighted_sum"] += after[1] * after[2]
+                d["kpi_weight_sum"] += after[2]
+
+        gone = [pair for pair in pairs if pair in old and pair not in new]
+        if gone:
+            cr.execute(
+                "DELETE FROM ojt_participant_score WHERE (participant_id, assignment_id) IN %s",
+                [tuple(gone)],
+            )
+        if new:
+            cr.execute(
+                """
+                INSERT INTO ojt_participant_score (participant_id, assignment_id, best_score, norm, weight)
+                VALUES {}
+                ON CONFLICT (participant_id, assignment_id)
+                DO UPDATE SET best_score = EXCLUDED.best_score, norm = EXCLUDED.norm, weight = EXCLUDED.weight
+                """.format(", ".join(["%s"] * len(new))),
+                [(pid, aid) + vals for (pid, aid), vals in new.items()],
+            )
+        self._kpi_apply_deltas(deltas)
+
+    # Engine: withdraw the stored best scores of assignments about to be deleted
+    @api.model
+    def _kpi_drop_assignments(self, assignment_ids):
+        """Delete their score rows and subtract them from the participants' sums in one pass."""
+        if not assignment_ids:
+            return
+        self.env.cr.execute(
+            "DELETE FROM ojt_participant_score WHERE assignment_id = ANY(%s) RETURNING participant_id, norm, weight",
+            [list(assignment_ids)],
+        )
+        deltas = defaultdict(lambda: defaultdict(float))
+        for pid, norm, weight in self.env.cr.fetchall():
+            d = deltas[pid]
+            d["kpi_score_count"] -= 1
+            d["kpi_norm_sum"] -= norm
+            d["kpi_weighted_sum"] -= norm * weight
+            d["kpi_weight_sum"] -= weight
+        self._kpi_apply_deltas(deltas)
+
+    # Engine: re-weight stored best scores after assignment weight edits
+    @api.model
+    def _kpi_reweight_assignments(self, assignment_ids):
+        """Move every affected participant's sums by the weight delta in one statement."""
+        if not assignment_ids:
+            return
+        self.env["ojt.assignment"].flush_model(["max_score", "weight"])
+        self.env.cr.execute(
+            """
+            WITH old AS (
+                SELECT id, participant_id, norm, weight
+                  FROM ojt_participant_score
+                 WHERE assignment_id = ANY(%(ids)s)
+            ), upd AS (
+                UPDATE ojt_participant_score s
+                   SET norm = s.best_score / a.max_score * 100.0,
+                       weight = COALESCE(a.weight, 0)
+                  FROM ojt_assignment a
+                 WHERE a.id = s.assignment_id
+                   AND s.assignment_id = ANY(%(ids)s)
+                   AND a.max_score > 0
+             RETURNING s.id, s.participant_id, s.norm, s.weight
+            )
+            UPDATE ojt_participant p
+               SET kpi_norm_sum = COALESCE(p.kpi_norm_sum, 0) + d.d_norm,
+                   kpi_weighted_sum = COALESCE(p.kpi_weighted_sum, 0) + d.d_weighted,
+                   kpi_weight_sum = COALESCE(p.kpi_weight_sum, 0) + d.d_weight
+              FROM (
+                    SELECT upd.participant_id,
+                           SUM(upd.norm - old.norm) AS d_norm,
+                           SUM(upd.norm * upd.weight - old.norm * old.weight) AS d_weighted,
+                           SUM(upd.weight - old.weight) AS d_weight
+                      FROM upd
+                      JOIN old ON old.id = upd.id
+                  GROUP BY upd.participant_id
+                   ) d
+             WHERE p.id = d.participant_id
+         RETURNING p.id
+            """,
+            {"ids": list(assignment_ids)},
+        )
+        self.browse([r[0] for r in self.env.cr.fetchall()])._kpi_mark_changed()
+
+    # Engine: rebuild store and KPIs for any recordset with set-based SQL
+    def _kpi_rebuild(self):
+        """Recompute the KPI store and the stored KPIs of these participants.
+
+        Presence ratios come from one grouped query over attendance, best
+        scores per assignment from one window-function query over submissions,
+        and attendance_rate/average_score/final_score are written in SQL so the
+        ORM does not recompute them participant by participant.
+        """
+        if not self:
+            return
+        self.env["ojt.attendance"].flush_model(["participant_id", "presence"])
+        self.env["ojt.submission"].flush_model(["score", "assignment_id", "participant_id"])
+        self.env["ojt.assignment"].flush_model(["max_score", "weight", "batch_id"])
+        self.flush_recordset(["batch_id", "mentor_score"])
+        cr = self.env.cr
+        params = {"ids": self.ids}
+
+        # Presence: one grouped pass over attendance
+        cr.execute(
+            """
+            UPDATE ojt_participant p
+               SET kpi_present_count = COALESCE(a.present, 0),
+                   kpi_total_count = COALESCE(a.total, 0)
+              FROM ojt_participant p2
+         LEFT JOIN (
+                    SELECT participant_id,
+                           COUNT(*) AS total,
+                           COUNT(*) FILTER (WHERE presence IN ('present', 'late')) AS present
+                      FROM ojt_attendance
+                     WHERE participant_id = ANY(%(ids)s)
+                  GROUP BY participant_id
+                   ) a ON a.participant_id = p2.id
+             WHERE p.id = p2.id
+               AND p.id = ANY(%(ids)s)
+            """,
+            params,
+        )
+
+        # Scores: best submission per (participant, assignment) via ROW_NUMBER()
+        cr.execute("DELETE FROM ojt_participant_score WHERE participant_id = ANY(%(ids)s)", params)
+        cr.execute(
+            """
+            INSERT INTO ojt_participant_score (participant_id, assignment_id, best_score, norm, weight)
+            SELECT participant_id, assignment_id, score, score / max_score * 100.0, weight
+              FROM (
+                    SELECT s.participant_id, s.assignment_id,
+                           COALESCE(s.score, 0) AS score,
+                           a.max_score,
+                           COALESCE(a.weight, 0) AS weight,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY s.participant_id, s.assignment_id
+                               ORDER BY COALESCE(s.score, 0) DESC, s.id
+                           ) AS rn
+                      FROM ojt_submission s
+                      JOIN ojt_assignment a ON a.id = s.assignment_id
+                      JOIN ojt_participant p ON p.id = s.participant_id
+                     WHERE s.participant_id = ANY(%(ids)s)
+                       AND a.batch_id = p.batch_id
+                       AND a.max_score > 0
+                   ) ranked
+             WHERE rn = 1
+            """,
+            params,
+        )
+
+        # Store sums and final KPIs in one statement (same formula as _compute_metrics)
+        cr.execute(
+            """
+            UPDATE ojt_participant p
+               SET kpi_score_count = x.cnt,
+                   kpi_norm_sum = x.norm_sum,
+                   kpi_weighted_sum = x.weighted_sum,
+                   kpi_weight_sum = x.weight_sum,
+                   attendance_rate = CASE WHEN p.kpi_total_count > 0
+                                          THEN LEAST(100.0, GREATEST(0.0, p.kpi_present_count * 100.0 / p.kpi_total_count))
+                                          ELSE 0.0 END,
+                   average_score = LEAST(100.0, GREATEST(0.0, x.task_avg)),
+                   final_score = ROUND((
+                       LEAST(100.0, GREATEST(0.0, CASE WHEN x.weight_sum > 1e-9
+                                                        THEN x.weighted_sum / x.weight_sum
+                                                        ELSE x.task_avg END)) * 0.80
+                       + COALESCE(p.mentor_score, 0) * 0.20
+                   )::numeric, 2)
+              FROM (
+                    SELECT p2.id,
+                           COUNT(sc.id) AS cnt,
+                           COALESCE(SUM(sc.norm), 0) AS norm_sum,
+                           COALESCE(SUM(sc.norm * sc.weight), 0) AS weighted_sum,
+                           COALESCE(SUM(sc.weight), 0) AS weight_sum,
+                           COALESCE(AVG(sc.norm), 0) AS task_avg
+                      FROM ojt_participant p2
+                 LEFT JOIN ojt_participant_score sc ON sc.participant_id = p2.id
+                     WHERE p2.id = ANY(%(ids)s)
+                  GROUP BY p2.id
+                   ) x
+             WHERE p.id = x.id
+            """,
+            params,
+        )
+
+        # KPIs are already up to date in the database: skip the ORM recompute
+        kpi_fields = [self._fields[f] for f in ("attendance_rate", "average_score", "final_score")]
+        self.invalidate_recordset(list(KPI_STORE_FIELDS) + [f.name for f in kpi_fields])
+        for field in kpi_fields:
+            self.env.remove_to_compute(field, self)
+
+    # Action: recompute KPIs for the selected participants (server action / buttons)
+    def action_recompute_kpis(self):
+        self.sudo()._kpi_rebuild()
+        return True
+
+    # Data hook: rebuild every participant's store on install/upgrade
+    @api.model
+    def _kpi_rebuild_all(self):
+        self.with_context(active_test=False).search([])._kpi_rebuild()
+
+    # Hook: a participant moving to another batch changes which submissions count
+    def write(self, vals):
+        res = super().write(vals)
+        if "batch_id" in vals:
+            self._kpi_rebuild()
+        return res
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+from odoo.tools import sql
+
+from .ojt_fields import BigInteger
+
+# Participant fields that the progress API exposes: a change bumps the version
+PROGRESS_WRITE_FIELDS = {"state", "mentor_score", "batch_id", "partner_id"}
+
+
+class OjtParticipant(models.Model):
+    _inherit = "ojt.participant"
+
+    # Delta sync: transaction id of this participant's last progress change
+    progress_version = BigInteger(string="Progress Version", default=0, copy=False, readonly=True)
+
+    def init(self):
+        super().init()
+        sql.create_index(
+            self.env.cr, "ojt_participant_batch_progress_idx", self._table, ["batch_id", "progress_version"]
+        )
+        # Tombstones: participants that left a batch (unlink or move), for since= clients
+        self.env.cr.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ojt_participant_progress_removed (
+                batch_id INTEGER NOT NULL,
+                participant_id INTEGER NOT NULL,
+                version BIGINT NOT NULL,
+                removed_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'UTC')
+            )
+            """
+        )
+        sql.create_index(
+            self.env.cr, "ojt_participant_progress_removed_idx", "ojt_participant_progress_removed", ["batch_id", "version"]
+        )
+
+    # Version: stamp with the writer's transaction id (no shared counter row to lock)
+    def _progress_touch(self):
+        """A reader's snapshot xmin is a safe resume point: later commits carry a txid >= xmin."""
+        ids = [pid for pid in self.ids if pid]
+        if not ids:
+            return
+        self.env.cr.execute(
+            "UPDATE ojt_participant SET progress_version = txid_current() WHERE id = ANY(%s)", [ids]
+        )
+        self.invalidate_recordset(["progress_version"])
+
+    # Tombstones: record (batch_id, participant_id) pairs leaving a batch
+    @api.model
+    def _progress_remove(self, pairs):
+        pairs = [(b, p) for b, p in pairs if b and p]
+        if not pairs:
+            return
+        self.env.cr.execute(
+            "INSERT INTO ojt_participant_progress_removed (batch_id, participant_id, version) VALUES "
+            + ", ".join(["(%s, %s, txid_current())"] * len(pairs)),
+            [v for pair in pairs for v in pair],
+        )
+
+    # Hooks: KPI engine (SQL deltas and rebuilds) and API-visible writes
+    def _kpi_mark_changed(self):
+        super()._kpi_mark_changed()
+        self._progress_touch()
+
+    def _kpi_rebuild(self):
+        res = super()._kpi_rebuild()
+        self._progress_touch()
+        return res
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._progress_touch()
+        return records
+
+    def write(self, vals):
+        before = [(rec.batch_id.id, rec.id) for rec in self] if "batch_id" in vals else []
+        res = super().write(vals)
+        if PROGRESS_WRITE_FIELDS & set(vals):
+            self._progress_touch()
+        if before:
+            self._progress_remove([(bid, pid) for bid, pid in before if bid != vals["batch_id"]])
+        return res
+
+    def unlink(self):
+        self._progress_remove([(rec.batch_id.id, rec.id) for rec in self])
+        return super().unlink()
+
+
+class OjtChangeLog(models.Model):
+    _inherit = "ojt.change.log"
+
+    # Cron: progress tombstones share the change log retention window
+    @api.model
+    def _cron_purge(self):
+        super()._cron_purge()
+        days = int(self.env["ir.config_parameter"].sudo().get_param("ojt_change_log_retention_days", 30) or 30)
+        self.env.cr.execute(
+            "DELETE FROM ojt_participant_progress_removed WHERE removed_at < %s",
+            [fields.Datetime.subtract(fields.Datetime.now(), days=days)],
+        )
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+from typing import NamedTuple
+
+from odoo import api, fields, models, tools
+
+
+# Portal rows: immutable projections, safe to share through ormcache
+class PortalSubmission(NamedTuple):
+    id: int
+    assignment_name: str
+    score: float
+    create_date: object
+
+
+class PortalAttendance(NamedTuple):
+    id: int
+    session: str
+    create_date: object
+    presence: str
+    qr_token: str
+    online_meeting_url: str
+    join_url: str
+
+
+class PortalCertificate(NamedTuple):
+    id: int
+    name: str
+    serial_number: str
+    issued_on: object
+    state: str
+
+
+class PortalSections(NamedTuple):
+    submissions: tuple
+    attendance: tuple
+    certificates: tuple
+
+
+# Section queries: {where} adds the keyset condition, {limit} the page size
+PORTAL_QUERIES = {
+    "submissions": (
+        """
+        SELECT s.id, a.name, s.score, s.create_date
+          FROM ojt_submission s
+          JOIN ojt_assignment a ON a.id = s.assignment_id
+         WHERE s.participant_id = %(participant_id)s {where}
+      ORDER BY s.create_date DESC, s.id DESC
+        {limit}
+        """,
+        "s",
+        PortalSubmission,
+    ),
+    "attendance": (
+        """
+        SELECT a.id, COALESCE(ev.name->>%(lang)s, ev.name->>'en_US', ''),
+               a.create_date, a.presence, a.qr_token, e.online_meeting_url
+          FROM ojt_attendance a
+     LEFT JOIN ojt_event_link e ON e.id = a.event_link_id
+     LEFT JOIN event_event ev ON ev.id = e.event_id
+         WHERE a.participant_id = %(participant_id)s {where}
+      ORDER BY a.create_date DESC, a.id DESC
+        {limit}
+        """,
+        "a",
+        PortalAttendance,
+    ),
+    "certificates": (
+        """
+        SELECT c.id, c.name, c.serial_number, c.issued_on, c.state
+          FROM ojt_certificate c
+         WHERE c.participant_id = %(participant_id)s {where}
+      ORDER BY c.create_date DESC, c.id DESC
+        {limit}
+        """,
+        "c",
+        PortalCertificate,
+    ),
+}
+
+
+class OjtParticipant(models.Model):
+    _inherit = "ojt.participant"
+
+    # Cache key: bumped whenever anything shown on this participant's portal page changes
+    portal_revision = fields.Integer(string="Portal Revision", default=0, copy=False, readonly=True)
+
+    # Revision: bump with one UPDATE (no ORM write, no mail tracking)
+    @api.model
+    def _portal_touch(self, participant_ids):
+        ids = [pid for pid in set(participant_ids) if pid]
+        if not ids:
+            return
+        self.env.cr.execute(
+            "UPDATE ojt_participant SET portal_revision = portal_revision + 1 WHERE id = ANY(%s)", [ids]
+        )
+        self.browse(ids).invalidate_recordset(["portal_revision"])
+
+    # Revision: every participant of these batches (assignment/session renames)
+    @api.model
+    def _portal_touch_batches(self, batch_ids):
+        ids = [bid for bid in set(batch_ids) if bid]
+        if not ids:
+            return
+        self.env.cr.execute(
+            "UPDATE ojt_participant SET portal_revision = portal_revision + 1 WHERE batch_id = ANY(%s)", [ids]
+        )
+        self.invalidate_model(["portal_revision"])
+
+    # Counter: portal participant count per partner (layout values on every portal page)
+    @api.model
+    def _portal_participant_count(self, partner_id):
+        """One index-only count on partner_id; cheaper than keeping a cache coherent across workers."""
+        return self.sudo().search_count([("partner_id", "=", partner_id)])
+
+    # Sections: joined projections for the detail page, cached per (participant, revision, lang)
+    def _portal_sections(self):
+        self.ensure_one()
+        self.flush_recordset(["portal_revision"])
+        self.env.cr.execute("SELECT portal_revision FROM ojt_participant WHERE id = %s", [self.id])
+        revision = self.env.cr.fetchone()[0]
+        return self._portal_sections_cached(self.id, revision, self.env.lang or "en_US")
+
+    @api.model
+    @tools.ormcache("participant_id", "revision", "lang")
+    def _portal_sections_cached(self, participant_id, revision, lang):
+        """One query per section; titles come from joins instead of row-by-row related fields."""
+        return PortalSections(
+            self._portal_rows("submissions", participant_id, lang),
+            self._portal_rows("attendance", participant_id, lang),
+            self._portal_rows("certificates", participant_id, lang),
+        )
+
+    # Rows: one section, newest first on (create_date, id); keyset page when ``cursor``/``limit`` given
+    @api.model
+    def _portal_rows(self, section, participant_id, lang, cursor=None, limit=None):
+        for model in ("ojt.submission", "ojt.attendance", "ojt.certificate", "ojt.assignment", "ojt.event.link"):
+            self.env[model].flush_model()
+        query, alias, row_type = PORTAL_QUERIES[section]
+        params = {"participant_id": participant_id, "lang": lang, "limit": limit}
+        where = ""
+        if cursor:
+            where = f"AND ({alias}.create_date, {alias}.id) < (%(cursor_date)s, %(cursor_id)s)"
+            params.update(cursor_date=cursor[0], cursor_id=cursor[1])
+        self.env.cr.execute(
+            query.format(where=where, limit="LIMIT %(limit)s" if limit else ""),
+            params,
+        )
+        rows = self.env.cr.fetchall()
+        if section == "attendance":
+            base = self.env["ir.config_parameter"].sudo().get_param("web.base.url", "").rstrip("/")
+            return tuple(PortalAttendance(*row, join_url=f"{base}/ojt/a/{row[4]}" if row[4] else "") for row in rows)
+        return tuple(row_type(*row) for row in rows)
+
+
+class OjtPortalTouchMixin(models.AbstractModel):
+    _name = "ojt.portal.touch.mixin"
+    _description = "OJT Portal Cache Invalidation"
+
+    # Hooks: bump the revision of every participant whose portal rows change
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env["ojt.participant"]._portal_touch(records.participant_id.ids)
+        return records
+
+    def write(self, vals):
+        before = self.participant_id.ids if "participant_id" in vals else []
+        res = super().write(vals)
+        self.env["ojt.participant"]._portal_touch(before + self.participant_id.ids)
+        return res
+
+    def unlink(self):
+        participant_ids = self.participant_id.ids
+        res = super().unlink()
+        self.env["ojt.participant"]._portal_touch(participant_ids)
+        return res
+
+
+class OjtAttendance(models.Model):
+    _name = "ojt.attendance"
+    _inherit = ["ojt.attendance", "ojt.portal.touch.mixin"]
+
+
+class OjtSubmission(models.Model):
+    _name = "ojt.submission"
+    _inherit = ["ojt.submission", "ojt.portal.touch.mixin"]
+
+
+class OjtCertificate(models.Model):
+    _name = "ojt.certificate"
+    _inherit = ["ojt.certificate", "ojt.portal.touch.mixin"]
+
+
+class OjtAssignment(models.Model):
+    _inherit = "ojt.assignment"
+
+    # Hook: renamed/moved assignments show up on every portal page of the batch
+    def write(self, vals):
+        batches = self.batch_id.ids if {"name", "batch_id"} & set(vals) else []
+        res = super().write(vals)
+        if batches:
+            self.env["ojt.participant"]._portal_touch_batches(batches + self.batch_id.ids)
+        return res
+
+
+class OjtEventLink(models.Model):
+    _inherit = "ojt.event.link"
+
+    # Hook: session titles and meeting links are part of the attendance rows
+    def write(self, vals):
+        batches = self.batch_id.ids if {"event_id", "online_meeting_url", "batch_id"} & set(vals) else []
+        res = super().write(vals)
+        if batches:
+            self.env["ojt.participant"]._portal_touch_batches(batches + self.batch_id.ids)
+        return res
+
+
+class EventEvent(models.Model):
+    _inherit = "event.event"
+
+    # Hook: event names are the session titles of the attendance rows
+    def write(self, vals):
+        res = super().write(vals)
+        if "name" in vals:
+            links = self.env["ojt.event.link"].sudo().search([("event_id", "in", self.ids)])
+            self.env["ojt.participant"]._portal_touch_batches(links.batch_id.ids)
+        return res
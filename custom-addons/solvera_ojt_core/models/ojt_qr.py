@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import io
+import os
+import time
+import zipfile
+
+from reportlab.graphics import renderSVG
+from reportlab.graphics.barcode import createBarcodeDrawing
+
+from odoo import api, models, tools
+
+QR_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+QR_MIN_SIZE, QR_MAX_SIZE, QR_SIZE_STEP = 64, 1024, 32
+# Served files get their mtime refreshed at most once per this many seconds (the purge reads mtime)
+QR_TOUCH_INTERVAL = 86400
+
+
+class OjtQr(models.AbstractModel):
+    _name = "ojt.qr"
+    _description = "OJT QR Image Service"
+
+    # Util: clamp and round the size so the cache holds a bounded number of variants
+    @api.model
+    def _normalize_size(self, size):
+        try:
+            size = int(size or 512)
+        except (TypeError, ValueError):
+            size = 512
+        size = min(QR_MAX_SIZE, max(QR_MIN_SIZE, size))
+        return size - size % QR_SIZE_STEP
+
+    # Cache: <filestore>/ojt_qr/<first two hex>/<sha1>.<fmt>
+    @api.model
+    def _cache_root(self):
+        return os.path.join(tools.config.filestore(self.env.cr.dbname), "ojt_qr")
+
+    @api.model
+    def _cache_path(self, key, fmt):
+        root = os.path.join(self._cache_root(), key[:2])
+        os.makedirs(root, exist_ok=True)
+        return os.path.join(root, "%s.%s" % (key, fmt))
+
+    # Render: PNG via the report barcode engine, SVG straight from reportlab
+    @api.model
+    def _render(self, value, fmt, size):
+        if fmt == "svg":
+            drawing = createBarcodeDrawing("QR", value=value, width=size, height=size, barBorder=1)
+            return renderSVG.drawToString(drawing).encode()
+        return self.env["ir.actions.report"].barcode("QR", value, width=size, height=size, quiet=1)
+
+    # Public: cached image bytes and cache key (used as ETag)
+    @api.model
+    def get_image(self, value, fmt="png", size=512):
+        """Return (content, key) for ``value``; the file is rendered once per value/format/size."""
+        fmt = fmt if fmt in QR_FORMATS else "png"
+        size = self._normalize_size(size)
+        key = hashlib.sha1(("%s|%s|%s" % (fmt, size, value)).encode()).hexdigest()
+        path = self._cache_path(key, fmt)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+                if os.fstat(f.fileno()).st_mtime < time.time() - QR_TOUCH_INTERVAL:
+                    os.utime(path)  # still in use: keep it out of the purge
+                return content, key
+        except OSError:
+            pass
+        content = self._render(value, fmt, size)
+        tmp = "%s.%s.tmp" % (path, os.getpid())
+        with open(tmp, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)  # atomic: concurrent workers never read a partial file
+        return content, key
+
+    # Cron: drop files not served within the retention window (tokens of deleted rows stop being served)
+    @api.model
+    def _cron_purge_cache(self):
+        days = int(self.env["ir.config_parameter"].sudo().get_param("ojt_qr_cache_retention_days", 30) or 30)
+        cutoff = time.time() - days * 86400
+        for dirpath, _dirnames, filenames in os.walk(self._cache_root()):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.stat(path).st_mtime < cutoff:
+                        os.unlink(path)
+                except OSError:
+                    continue  # removed by a concurrent purge or re-rendered meanwhile
+
+    # Public: many images zipped in one response body
+    @api.model
+    def get_zip(self, entries, fmt="png", size=512):
+        """``entries`` is an iterable of (filename without extension, value)."""
+        fmt = fmt if fmt in QR_FORMATS else "png"
+        buf = io.BytesIO()
+        seen = set()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:  # PNG/SVG gain little from deflate
+            for name, value in entries:
+                name = name.replace("/", "-")
+                while name in seen:
+                    name += "_"
+                seen.add(name)
+                content, _key = self.get_image(value, fmt, size)
+                zf.writestr("%s.%s" % (name, fmt), content)
+        return buf.getvalue()
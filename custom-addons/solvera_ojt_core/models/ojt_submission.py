@@ -46,6 +46,33 @@ class OjtSubmission(models.Model):
         tracking=True,
     )
 
+    # Create: refresh best-score KPI store for touched pairs
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env["ojt.participant"]._kpi_refresh_scores(records._kpi_pairs())
+        return records
+
+    # Write: refresh KPI store only when scoring inputs change
+    def write(self, vals):
+        if not {"score", "assignment_id", "participant_id"} & set(vals):
+            return super().write(vals)
+        pairs = self._kpi_pairs()
+        res = super().write(vals)
+        self.env["ojt.participant"]._kpi_refresh_scores(pairs | self._kpi_pairs())
+        return res
+
+    # Unlink: drop this submission from the best-score store
+    def unlink(self):
+        pairs = self._kpi_pairs()
+        res = super().unlink()
+        self.env["ojt.participant"]._kpi_refresh_scores(pairs)
+        return res
+
+    # Helper: (participant, assignment) keys of the KPI store
+    def _kpi_pairs(self):
+        return {(rec.participant_id.id, rec.assignment_id.id) for rec in self}
+
     # Compute display name from participant and assignment
     @api.depends("participant_id.display_name", "assignment_id.display_name")
     def _compute_name(self):
@@ -38,3 +38,19 @@ class ResConfigSettings(models.TransientModel):
         config_parameter="ojt_close_checkin_after_end_minutes",
         help="Minutes after session end when check-in remains open.",
     )
+
+    # Settings: high-throughput QR check-in
+    ojt_fast_checkin = fields.Boolean(
+        string="OJT Fast QR Check-in",
+        config_parameter="ojt_fast_checkin",
+        help="Check in with a single conditional SQL update; chatter notes go through the attendance note queue.",
+    )
+
+    # Settings: chatter logging for attendance events
+    ojt_attendance_log_mode = fields.Selection(
+        [("record", "Note per attendance"), ("digest", "Digest per session"), ("none", "No notes")],
+        string="OJT Attendance Notes",
+        default="record",
+        config_parameter="ojt_attendance_log_mode",
+        help="How buffered check-in/out and cron events are written to the chatter.",
+    )
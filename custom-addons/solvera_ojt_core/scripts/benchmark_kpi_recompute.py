@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""Benchmark: per-participant ORM KPI loop vs. set-based SQL recompute.
+
+Run inside an Odoo shell on a database with solvera_ojt_core installed:
+
+    odoo shell -d <db> < custom-addons/solvera_ojt_core/scripts/benchmark_kpi_recompute.py
+
+Fixture data (5,000 participants x 50 assignments, 20 sessions) is inserted
+mostly with plain SQL inside a savepoint and rolled back at the end, so the database
+is left untouched.
+"""
+import time
+
+PARTICIPANTS = 5000
+ASSIGNMENTS = 50
+SESSIONS = 20
+
+
+def legacy_metrics(participants):
+    """The former _compute_metrics loop, walking one2many sets through the ORM."""
+    out = {}
+    for rec in participants:
+        total = len(rec.attendance_ids)
+        present = sum(1 for a in rec.attendance_ids if a.presence in ("present", "late"))
+        by_assign = {}
+        for s in rec.submission_ids:
+            asg = s.assignment_id
+            if asg.batch_id != rec.batch_id or (asg.max_score or 0.0) <= 0:
+                continue
+            if asg.id not in by_assign or (s.score or 0.0) > (by_assign[asg.id].score or 0.0):
+                by_assign[asg.id] = s
+        normals, w_sum, w_tot = [], 0.0, 0.0
+        for s in by_assign.values():
+            norm = (s.score or 0.0) / s.assignment_id.max_score * 100.0
+            normals.append(norm)
+            w_sum += norm * (s.assignment_id.weight or 0.0)
+            w_tot += s.assignment_id.weight or 0.0
+        avg = sum(normals) / len(normals) if normals else 0.0
+        final = (w_sum / w_tot) if w_tot else avg
+        out[rec.id] = (present / total * 100.0 if total else 0.0, avg, round(final * 0.8 + (rec.mentor_score or 0.0) * 0.2, 2))
+    return out
+
+
+def build_fixture(env):
+    cr = env.cr
+    batch = env["ojt.batch"].create({
+        "name": "KPI benchmark %s" % time.time(),
+        "start_date": "2025-01-01",
+        "end_date": "2025-06-30",
+    })
+    partner_ids = env["res.partner"].create([{"name": "Bench %s" % i} for i in range(PARTICIPANTS)]).ids
+    env.flush_all()
+    cr.execute(
+        """
+        INSERT INTO ojt_participant (batch_id, partner_id, state, name, create_date, write_date)
+        SELECT %s, pid, 'active', 'Bench', now(), now() FROM unnest(%s) pid
+        RETURNING id
+        """,
+        [batch.id, partner_ids],
+    )
+    participant_ids = [r[0] for r in cr.fetchall()]
+    cr.execute(
+        """
+        INSERT INTO ojt_assignment (batch_id, name, type, state, max_score, weight, create_date, write_date)
+        SELECT %s, 'Task ' || g, 'task', 'open', 100, (g %% 5) + 1, now(), now() FROM generate_series(1, %s) g
+        RETURNING id
+        """,
+        [batch.id, ASSIGNMENTS],
+    )
+    assignment_ids = [r[0] for r in cr.fetchall()]
+    cr.execute(
+        """
+        INSERT INTO ojt_submission (participant_id, assignment_id, score, state, name, create_date, write_date)
+        SELECT p, a, floor(random() * 101), 'scored', 'Bench', now(), now()
+          FROM unnest(%s) p CROSS JOIN unnest(%s) a
+        """,
+        [participant_ids, assignment_ids],
+    )
+    cr.execute(
+        """
+        INSERT INTO ojt_attendance (batch_id, participant_id, presence, method, create_date, write_date)
+        SELECT %s, p, CASE WHEN random() < 0.8 THEN 'present' ELSE 'absent' END, 'manual', now(), now()
+          FROM unnest(%s) p CROSS JOIN generate_series(1, %s)
+        """,
+        [batch.id, participant_ids, SESSIONS],
+    )
+    env.invalidate_all()
+    return env["ojt.participant"].browse(participant_ids)
+
+
+def run(env):
+    cr = env.cr
+    cr.execute("SAVEPOINT ojt_kpi_benchmark")
+    try:
+        participants = build_fixture(env)
+        print("Fixture: %s participants x %s assignments, %s sessions" % (PARTICIPANTS, ASSIGNMENTS, SESSIONS))
+
+        env.invalidate_all()
+        t0 = time.perf_counter()
+        expected = legacy_metrics(participants)
+        legacy = time.perf_counter() - t0
+
+        env.invalidate_all()
+        t0 = time.perf_counter()
+        participants._kpi_rebuild()
+        bulk = time.perf_counter() - t0
+
+        env.invalidate_all()
+        mismatches = sum(
+            1 for p in participants
+            if abs(p.attendance_rate - expected[p.id][0]) > 0.01
+            or abs(p.average_score - expected[p.id][1]) > 0.01
+            or abs(p.final_score - expected[p.id][2]) > 0.01
+        )
+        print("ORM loop:       %8.2f s" % legacy)
+        print("SQL bulk path:  %8.2f s" % bulk)
+        print("Speedup:        %8.1fx" % (legacy / bulk if bulk else float("inf")))
+        print("Mismatches:     %8d" % mismatches)
+    finally:
+        env.invalidate_all(flush=False)
+        cr.execute("ROLLBACK TO SAVEPOINT ojt_kpi_benchmark")
+
+
+run(env)  # noqa: F821 - provided by odoo shell